@@ -4,7 +4,18 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+from collections import OrderedDict
+from contextlib import contextmanager
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from pricing.config import DB_CONFIG
+from pricing.registry import resolve
+import charts
+import data_access
 
 st.set_page_config(
     page_title="Dynamic Pricing Engine",
@@ -116,34 +127,73 @@ if not st.session_state["logged_in"]:
     st.stop()
 
 # --- Load Data from DB ---
-@st.cache_data
-def load_data():
-    conn = psycopg2.connect(
-        dbname="pricing_engine",
-        user="postgres",
-        password="hiba0702",
-        host="localhost",
-        port="5432"
-    )
-    features = pd.read_sql("SELECT * FROM daily_features", conn)
-    predicted = pd.read_sql("SELECT * FROM predicted_prices", conn)
-    conn.close()
-
-    features["product_id"] = features["product_id"].astype(str)
-    predicted["product_id"] = predicted["product_id"].astype(str)
-    features["date"] = pd.to_datetime(features["date"])
-    predicted["date"] = pd.to_datetime(predicted["date"])
-
-    sales_data = pd.merge(
-        features,
-        predicted,
-        on=["product_id", "date"],
-        how="left"
-    )
-    return sales_data
-
-sales_data = load_data()
-products = sales_data["product_id"].unique() if "product_id" in sales_data.columns else []
+# Connections come from one pool per app process. Cached results are keyed on a cheap
+# freshness watermark (latest pipeline_loads row), so they are only refetched after the
+# daily job has committed new data.
+WATERMARK_TTL_SEC = 30
+ROW_CACHE_ENTRIES = 32
+
+@st.cache_resource
+def get_pool():
+    return ThreadedConnectionPool(1, 8, **DB_CONFIG)
+
+@contextmanager
+def pooled_connection():
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+@st.cache_data(ttl=WATERMARK_TTL_SEC)
+def current_watermark():
+    with pooled_connection() as conn:
+        return data_access.watermark(conn)
+
+# Aggregates are small: refetch whole when the watermark moves.
+@st.cache_data(max_entries=256)
+def cached_query(name, watermark, *args):
+    with pooled_connection() as conn:
+        return getattr(data_access, name)(conn, *args)
+
+def query(name, *args):
+    return cached_query(name, current_watermark(), *args)
+
+# Shared by every session (each runs on its own thread): an LRU of at most
+# ROW_CACHE_ENTRIES results, only touched while holding the lock.
+@st.cache_resource
+def row_cache():
+    return OrderedDict(), threading.Lock()
+
+def query_rows(name, *args):
+    """Row-level query that, after a new load, re-reads only the dates that load touched."""
+    watermark = current_watermark()
+    cache, lock = row_cache()
+    key = (name, args)
+    with lock:
+        cached = cache.get(key)
+        if cached is not None:
+            cache.move_to_end(key)
+    if cached is not None and cached[0] == watermark:
+        return cached[1]
+    with pooled_connection() as conn:
+        since = cached[0][0] if cached is not None else None
+        if since is not None and watermark[0] is not None:
+            start, end = data_access.loaded_dates_since(conn, since)
+            df = cached[1] if start is None else data_access.refresh_slice(conn, name, args, cached[1], start, end)
+        else:
+            df = getattr(data_access, name)(conn, *args)
+    with lock:
+        cache[key] = (watermark, df)
+        cache.move_to_end(key)
+        while len(cache) > ROW_CACHE_ENTRIES:
+            cache.popitem(last=False)
+    return df
+
+min_date, max_date = query("date_bounds")
+products = query("product_ids")
 
 # --- Sidebar Navigation ---
 st.sidebar.markdown(
@@ -180,6 +230,9 @@ st.sidebar.markdown(
     unsafe_allow_html=True
 )
 
+model = resolve()
+st.sidebar.caption(f"Model v{model['version']} · {model['sha256'][:12]}")
+
 # Logout button
 if st.sidebar.button("Logout", key="logout_btn"):
     st.session_state["logged_in"] = False
@@ -191,8 +244,9 @@ if dashboard == "Sales & Demand":
 
     # KPI Cards
     col1, col2, col3, col4 = st.columns(4)
+    kpis = query("kpi_totals")
     with col1:
-        total_revenue = sales_data["revenue"].sum()
+        total_revenue = kpis["total_revenue"]
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-value">₹{total_revenue:,.0f}</div>
@@ -200,7 +254,7 @@ if dashboard == "Sales & Demand":
         </div>
         """, unsafe_allow_html=True)
     with col2:
-        avg_units = sales_data["units_sold"].mean()
+        avg_units = kpis["avg_units"]
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-value">{avg_units:.1f}</div>
@@ -208,7 +262,7 @@ if dashboard == "Sales & Demand":
         </div>
         """, unsafe_allow_html=True)
     with col3:
-        total_views = sales_data["views"].sum()
+        total_views = kpis["total_views"]
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-value">{total_views:,.0f}</div>
@@ -216,7 +270,7 @@ if dashboard == "Sales & Demand":
         </div>
         """, unsafe_allow_html=True)
     with col4:
-        total_purchases = sales_data["purchases"].sum()
+        total_purchases = kpis["total_purchases"]
         st.markdown(f"""
         <div class="metric-card">
             <div class="metric-value">{total_purchases:,.0f}</div>
@@ -227,36 +281,48 @@ if dashboard == "Sales & Demand":
     # Filters
     col1, col2 = st.columns(2)
     with col1:
-        date_range = st.date_input("Select Date Range", [sales_data["date"].min(), sales_data["date"].max()])
+        date_range = st.date_input("Select Date Range", [min_date, max_date])
     with col2:
         selected_products = st.multiselect("Select Products", products, default=products[:3])
 
     # Handle single date selection
     if len(date_range) == 1:
-        start_date_filter = pd.to_datetime(date_range[0])
-        end_date_filter = pd.to_datetime(date_range[0])
+        start_date_filter = date_range[0]
+        end_date_filter = date_range[0]
     else:
-        start_date_filter = pd.to_datetime(date_range[0])
-        end_date_filter = pd.to_datetime(date_range[1])
-
-    filtered_data = sales_data[
-        (sales_data["date"] >= start_date_filter) &
-        (sales_data["date"] <= end_date_filter) &
-        (sales_data["product_id"].isin(selected_products))
-    ]
+        start_date_filter = date_range[0]
+        end_date_filter = date_range[1]
+    product_key = tuple(selected_products)
+
+    # Two series per product (units, revenue). The finest rollup that fits the chart's point
+    # budget is summed in PostgreSQL; daily rows keep the incremental row cache, and weekly
+    # or monthly buckets are few enough to refetch whole after a load.
+    n_series = 2 * len(selected_products)
+    resolution = charts.pick_resolution(start_date_filter, end_date_filter, n_series)
+    if resolution == "day":
+        trend_data = query_rows("sales_trends", start_date_filter, end_date_filter, product_key)
+    else:
+        trend_data = query("sales_trends", start_date_filter, end_date_filter, product_key, resolution)
+    series_points = max(charts.MIN_SERIES_POINTS, charts.MAX_POINTS // max(n_series, 1))
 
     # Charts
     st.markdown("#### Sales Trends")
     fig = make_subplots(specs=[[{"secondary_y": True}]])
-    for prod in selected_products:
-        prod_data = filtered_data[filtered_data["product_id"] == prod]
-        fig.add_trace(go.Scatter(x=prod_data["date"], y=prod_data["units_sold"], name=f"Units - {prod}", mode='lines'), secondary_y=False)
-        fig.add_trace(go.Bar(x=prod_data["date"], y=prod_data["revenue"], name=f"Revenue - {prod}", opacity=0.6), secondary_y=True)
-    fig.update_layout(title="Units Sold & Revenue Trends", template="plotly_dark")
+    points = 0
+    for prod, prod_data in trend_data.groupby("product_id", sort=False, observed=True):
+        units = charts.downsample(prod_data, "date", "units_sold", series_points)
+        revenue = charts.downsample(prod_data, "date", "revenue", series_points)
+        points += len(units) + len(revenue)
+        fig.add_trace(go.Scattergl(x=units["date"], y=units["units_sold"], name=f"Units - {prod}", mode="lines"), secondary_y=False)
+        fig.add_trace(go.Scattergl(x=revenue["date"], y=revenue["revenue"], name=f"Revenue - {prod}", mode="lines",
+                                   line={"dash": "dot"}, opacity=0.7), secondary_y=True)
+    label = {"day": "Daily", "week": "Weekly", "month": "Monthly"}[resolution]
+    fig.update_layout(title=f"Units Sold & Revenue Trends ({label})", template="plotly_dark")
     st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{label} totals · {points:,} points")
 
     st.markdown("#### Product Performance Heatmap")
-    perf_df = filtered_data.groupby("product_id").agg({"units_sold": "mean", "revenue": "mean", "views": "mean"}).reset_index()
+    perf_df = query("product_performance", start_date_filter, end_date_filter, product_key)
     perf_melt = perf_df.melt(id_vars="product_id", var_name="Metric", value_name="Value")
     fig_heat = px.bar(perf_melt, x="product_id", y="Value", color="Metric", barmode="group", title="Product Performance Metrics")
     st.plotly_chart(fig_heat, use_container_width=True)
@@ -266,8 +332,8 @@ elif dashboard == "Competitor Price Comparison":
     st.title("💸 Competitor Price Comparison Dashboard")
     st.markdown("#### Compare Our Price vs Flipkart, Amazon, Myntra")
 
-    if all(col in sales_data.columns for col in ["product_id", "flipkart_price", "amazon_price", "myntra_price"]):
-        comp_df = sales_data[["product_id", "flipkart_price", "amazon_price", "myntra_price"]].drop_duplicates()
+    comp_df = query("competitor_prices")
+    if not comp_df.empty:
         comp_melt = comp_df.melt(id_vars="product_id", var_name="Platform", value_name="Price")
         fig_comp = px.bar(
             comp_melt,
@@ -275,18 +341,6 @@ elif dashboard == "Competitor Price Comparison":
             title="Price Comparison Across Platforms"
         )
         st.plotly_chart(fig_comp, use_container_width=True)
-
-        comp_df["Avg Competitor"] = comp_df[["flipkart_price", "amazon_price", "myntra_price"]].mean(axis=1)
-        if "price" in sales_data.columns:
-            own_price = sales_data.groupby("product_id")["price"].mean()
-            comp_df["Our Price"] = comp_df["product_id"].map(own_price)
-            comp_df["Price Diff"] = comp_df["Our Price"] - comp_df["Avg Competitor"]
-            too_high = comp_df[comp_df["Price Diff"] > 1000]["product_id"].tolist()
-            too_low = comp_df[comp_df["Price Diff"] < -1000]["product_id"].tolist()
-            if too_high:
-                st.warning(f"Our price is too high for: {', '.join(str(i) for i in too_high)}")
-            if too_low:
-                st.success(f"Our price is lower than competitors for: {', '.join(str(i) for i in too_low)}")
     else:
         st.info("Competitor data not available or columns missing.")
 
@@ -295,23 +349,9 @@ elif dashboard == "Price Recommendations":
     st.title("💡 Price Recommendations Dashboard")
     st.markdown("#### AI-Powered Pricing Suggestions")
 
-    if "predicted_price" in sales_data.columns:
-        rec_df = sales_data.groupby("product_id").agg({
-            "predicted_price": "mean",
-            "flipkart_price": "mean",
-            "amazon_price": "mean",
-            "myntra_price": "mean",
-            "units_sold": "mean",
-            "stock": "mean"
-        }).reset_index()
-
-        rec_df["Avg Competitor Price"] = rec_df[["flipkart_price", "amazon_price", "myntra_price"]].mean(axis=1)
-        rec_df["Recommendation"] = rec_df.apply(
-            lambda row: "Increase Price" if row["predicted_price"] > row["Avg Competitor Price"] * 1.05 and row["units_sold"] > 10 else
-                        "Decrease Price" if row["predicted_price"] < row["Avg Competitor Price"] * 0.95 else
-                        "Maintain Price", axis=1
-        )
-
+    # Classified by the daily job (pricing/recommendations.py) and stored in price_recommendations.
+    rec_df = query("price_recommendations")
+    if not rec_df.empty and rec_df["predicted_price"].notna().any():
         st.dataframe(rec_df[["product_id", "predicted_price", "Avg Competitor Price", "Recommendation"]])
 
         # Visualization
@@ -322,11 +362,11 @@ elif dashboard == "Price Recommendations":
         st.plotly_chart(fig_rec, use_container_width=True)
 
         # Alerts
-        high_stock = rec_df[rec_df["stock"] > 100]["product_id"].tolist()
+        high_stock = rec_df[rec_df["high_stock"]]["product_id"].tolist()
         if high_stock:
             st.warning(f"High stock products (consider discount): {', '.join(str(i) for i in high_stock)}")
 
-        low_sales = rec_df[rec_df["units_sold"] < 5]["product_id"].tolist()
+        low_sales = rec_df[rec_df["low_sales"]]["product_id"].tolist()
         if low_sales:
             st.error(f"Low sales products (review pricing): {', '.join(str(i) for i in low_sales)}")
     else:
@@ -337,23 +377,48 @@ elif dashboard == "Customer Behavior":
     st.title("🛒 Customer Behavior Dashboard")
     st.markdown("#### Product Metrics")
 
-    if "product_id" in sales_data.columns:
-        st.dataframe(sales_data.set_index("product_id"))
+    # Only the visible page and columns are fetched; filter, sort and paging run in SQL.
+    total_rows = query("behavior_count")
+    if total_rows > 0:
+        col1, col2, col3 = st.columns([3, 2, 1])
+        with col1:
+            grid_columns = st.multiselect(
+                "Columns", data_access.BEHAVIOR_COLUMNS,
+                default=["date", "product_id", "views", "clicks", "add_to_cart", "purchases", "bounce_rate"]
+            )
+        with col2:
+            grid_products = st.multiselect("Filter Products", products)
+        with col3:
+            page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+        col1, col2, col3 = st.columns([2, 1, 1])
+        with col1:
+            sort_col = st.selectbox("Sort by", data_access.BEHAVIOR_COLUMNS)
+        with col2:
+            descending = st.checkbox("Descending")
+        product_key = tuple(grid_products)
+        filtered_rows = query("behavior_count", product_key) if product_key else total_rows
+        page_count = max(1, -(-filtered_rows // page_size))
+        with col3:
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+
+        page_df = query("behavior_page", tuple(grid_columns), sort_col, descending, product_key, int(page), page_size)
+        first_row = (int(page) - 1) * page_size + 1 if filtered_rows else 0
+        st.caption(f"Rows {first_row:,}–{min(int(page) * page_size, filtered_rows):,} of {filtered_rows:,}")
+        st.dataframe(page_df.set_index("product_id") if "product_id" in page_df.columns else page_df)
 
         st.markdown("#### Conversion Funnel")
+        funnel = query("funnel_totals")
         funnel_stages = ["views", "clicks", "add_to_cart", "purchases"]
-        funnel_counts = [sales_data[stage].sum() for stage in funnel_stages if stage in sales_data.columns]
-        funnel_df = pd.DataFrame({"Stage": funnel_stages[:len(funnel_counts)], "Count": funnel_counts})
+        funnel_df = pd.DataFrame({"Stage": funnel_stages, "Count": [funnel[stage] for stage in funnel_stages]})
 
         funnel_fig = px.funnel(funnel_df, x="Stage", y="Count", title="Overall Conversion Funnel")
         st.plotly_chart(funnel_fig, use_container_width=True)
 
-        if "views" in sales_data.columns and "clicks" in sales_data.columns:
-            if sales_data["views"].sum() > 0:
-                bounce_rate = 1 - (sales_data["clicks"].sum() / sales_data["views"].sum())
-                st.metric("Bounce Rate", f"{bounce_rate*100:.2f}%")
-            else:
-                st.metric("Bounce Rate", "N/A")
+        if funnel["views"] > 0:
+            bounce_rate = 1 - (funnel["clicks"] / funnel["views"])
+            st.metric("Bounce Rate", f"{bounce_rate*100:.2f}%")
+        else:
+            st.metric("Bounce Rate", "N/A")
     else:
         st.info("Behavior data not available.")
 
@@ -0,0 +1,63 @@
+"""Point budgets for the dashboard's time-series charts.
+
+``pick_resolution`` chooses the finest rollup (day, week or month) whose
+bucket count keeps every series of a chart within ``MAX_POINTS`` in total;
+the rollup itself runs in PostgreSQL (``data_access.sales_trends``). If a
+chart is still over budget (many products over a long range), each line is
+thinned with largest-triangle-three-buckets, which keeps the peaks and dips
+a plain stride would drop.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 5_000          # all traces of one chart together
+RESOLUTIONS = {"day": 1, "week": 7, "month": 365.25 / 12}
+MIN_SERIES_POINTS = 3
+
+
+def pick_resolution(start, end, n_series, max_points=MAX_POINTS):
+    """Finest resolution whose ``n_series`` series fit in ``max_points``."""
+    days = (pd.Timestamp(end) - pd.Timestamp(start)).days + 1
+    for resolution, width in RESOLUTIONS.items():
+        if math.ceil(days / width) * max(n_series, 1) <= max_points:
+            return resolution
+    return "month"
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points chosen by largest-triangle-three-buckets.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    kept point and the average of the next bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < MIN_SERIES_POINTS:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(df, x_col, y_col, n_out):
+    """Rows of ``df`` (sorted by ``x_col``) kept by ``lttb`` on ``y_col``."""
+    if len(df) <= n_out:
+        return df
+    x = df[x_col].to_numpy().astype("datetime64[s]").astype(np.int64) \
+        if np.issubdtype(df[x_col].dtype, np.datetime64) else df[x_col].to_numpy()
+    return df.iloc[lttb(x, df[y_col].to_numpy(), n_out)]
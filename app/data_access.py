@@ -0,0 +1,273 @@
+"""SQL queries behind each dashboard section.
+
+Every function takes an open connection plus the filters of one section and
+returns only the columns (and aggregates) that section renders, so date
+ranges, product selections and sums run in PostgreSQL instead of pandas.
+
+Row-level queries take ``start, end`` as their first filters so a cached
+result can be refreshed for just the dates a new load touched
+(see ``refresh_slice``).
+
+Aggregates read the pre-summed ``product_rollups`` / ``rollup_totals``
+tables the daily job maintains (pricing/rollups.py) rather than scanning
+``daily_features``: a date range is covered by its whole weeks or months
+plus day rows for the partial edges (``_rollup_parts``), and means are
+rebuilt as sums over row counts, so results match the raw aggregates.
+"""
+from datetime import timedelta
+
+import pandas as pd
+from psycopg2 import sql
+
+
+def _read(conn, sql, params=None, date_cols=()):
+    df = pd.read_sql(sql, conn, params=params)
+    if "product_id" in df.columns:
+        df["product_id"] = df["product_id"].astype(str)
+    for col in date_cols:
+        df[col] = pd.to_datetime(df[col])
+    return df
+
+
+# ---------- FRESHNESS ----------
+def watermark(conn):
+    """``(load_id, max_date)`` of the latest committed load.
+
+    ``load_id`` comes from ``pipeline_loads`` (written by the daily job) and
+    is ``None`` on databases created before that table existed.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('pipeline_loads') IS NOT NULL")
+        if cursor.fetchone()[0]:
+            cursor.execute("SELECT max(load_id), max(end_date) FROM pipeline_loads")
+            load_id, max_date = cursor.fetchone()
+            if load_id is not None:
+                return load_id, max_date
+        cursor.execute("SELECT max(date) FROM daily_features")
+        return None, cursor.fetchone()[0]
+
+
+def loaded_dates_since(conn, load_id):
+    """Date span covered by loads newer than ``load_id``; ``(None, None)`` if none."""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT min(start_date), max(end_date) FROM pipeline_loads WHERE load_id > %s", (load_id,)
+        )
+        return cursor.fetchone()
+
+
+def refresh_slice(conn, name, args, cached, start, end):
+    """Re-read dates ``start..end`` of row query ``name`` and splice them into ``cached``."""
+    query_start, query_end, *rest = args
+    lo = start if query_start is None else max(query_start, start)
+    hi = end if query_end is None else min(query_end, end)
+    if lo > hi:
+        return cached
+    fresh = globals()[name](conn, lo, hi, *rest)
+    dates = cached["date"].dt.date
+    kept = cached[(dates < lo) | (dates > hi)]
+    return pd.concat([kept, fresh], ignore_index=True).sort_values(["date", "product_id"]).reset_index(drop=True)
+
+
+# ---------- ROLLUPS ----------
+def _full_buckets(start, end, grain):
+    """``[lo, hi)``: the span of whole ``grain`` buckets that lie inside ``start..end``."""
+    start, end = pd.Timestamp(start).date(), pd.Timestamp(end).date()
+    after = end + timedelta(days=1)
+    if grain == "week":
+        lo = start + timedelta(days=-start.weekday() % 7)
+        hi = after - timedelta(days=after.weekday())
+    else:
+        lo = start if start.day == 1 else (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        hi = after.replace(day=1)
+    return lo, max(lo, hi)
+
+
+def _rollup_parts(start, end, products, grain="month"):
+    """CTE ``parts`` covering ``start..end`` with the fewest rollup rows, plus its params."""
+    lo, hi = _full_buckets(start, end, grain)
+    cte = """
+        WITH parts AS (
+            SELECT * FROM product_rollups
+            WHERE grain = %(grain)s AND period >= %(lo)s AND period < %(hi)s
+              AND product_id = ANY(%(products)s)
+            UNION ALL
+            SELECT * FROM product_rollups
+            WHERE grain = 'day' AND period BETWEEN %(start)s AND %(end)s
+              AND NOT (period >= %(lo)s AND period < %(hi)s)
+              AND product_id = ANY(%(products)s)
+        )
+    """
+    return cte, {"grain": grain, "lo": lo, "hi": hi, "start": start, "end": end, "products": list(products)}
+
+
+# ---------- FILTER OPTIONS ----------
+def date_bounds(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT first_date, last_date FROM rollup_totals")
+        return cursor.fetchone() or (None, None)
+
+
+def product_ids(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT DISTINCT product_id FROM product_rollups WHERE grain = 'month' ORDER BY product_id")
+        return [str(row[0]) for row in cursor.fetchall()]
+
+
+# ---------- SALES & DEMAND ----------
+def kpi_totals(conn):
+    """Total revenue, average units sold, total views and total purchases."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT COALESCE(sum(revenue), 0), COALESCE(sum(units_sold)::float / NULLIF(sum(days), 0), 0),
+                   COALESCE(sum(views), 0), COALESCE(sum(purchases), 0)
+            FROM rollup_totals
+        """)
+        revenue, avg_units, views, purchases = cursor.fetchone()
+    return {
+        "total_revenue": float(revenue),
+        "avg_units": float(avg_units),
+        "total_views": float(views),
+        "total_purchases": float(purchases),
+    }
+
+
+TREND_RESOLUTIONS = ("day", "week", "month")
+
+
+def sales_trends(conn, start, end, products, resolution="day"):
+    """Units sold and revenue per product, summed into day, week or month buckets.
+
+    Buckets are labelled with their first day (weeks start on Monday); edge
+    buckets only sum the days inside ``start..end``.
+    """
+    if resolution not in TREND_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution {resolution!r}; expected one of {TREND_RESOLUTIONS}")
+    if resolution == "day":
+        return _read(conn, """
+            SELECT period AS date, product_id, units_sold, revenue
+            FROM product_rollups
+            WHERE grain = 'day' AND period BETWEEN %(start)s AND %(end)s AND product_id = ANY(%(products)s)
+            ORDER BY product_id, period
+        """, {"start": start, "end": end, "products": list(products)}, date_cols=["date"])
+    parts, params = _rollup_parts(start, end, products, grain=resolution)
+    return _read(conn, parts + """
+        SELECT date_trunc(%(grain)s, period)::date AS date, product_id,
+               sum(units_sold) AS units_sold, sum(revenue) AS revenue
+        FROM parts
+        GROUP BY 1, product_id
+        ORDER BY product_id, 1
+    """, params, date_cols=["date"])
+
+
+def product_performance(conn, start, end, products):
+    parts, params = _rollup_parts(start, end, products)
+    return _read(conn, parts + """
+        SELECT product_id, sum(units_sold)::float / sum(days) AS units_sold,
+               sum(revenue)::float / sum(days) AS revenue, sum(views)::float / sum(days) AS views
+        FROM parts
+        GROUP BY product_id
+        ORDER BY product_id
+    """, params)
+
+
+# ---------- COMPETITOR PRICE COMPARISON ----------
+def competitor_prices(conn):
+    """Average price per platform for each product."""
+    return _read(conn, """
+        SELECT product_id, sum(flipkart_price)::float / sum(days) AS flipkart_price,
+               sum(amazon_price)::float / sum(days) AS amazon_price,
+               sum(myntra_price)::float / sum(days) AS myntra_price
+        FROM product_rollups
+        WHERE grain = 'month'
+        GROUP BY product_id
+        ORDER BY product_id
+    """)
+
+
+# ---------- PRICE RECOMMENDATIONS ----------
+def price_recommendations(conn):
+    """Precomputed recommendations written by the daily job (empty if none yet)."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('price_recommendations') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return pd.DataFrame()
+    return _read(conn, """
+        SELECT product_id, predicted_price, avg_competitor_price AS "Avg Competitor Price",
+               recommendation AS "Recommendation", units_sold, stock, high_stock, low_sales
+        FROM price_recommendations
+        ORDER BY product_id
+    """)
+
+
+# ---------- CUSTOMER BEHAVIOR ----------
+BEHAVIOR_COLUMNS = [
+    "date", "product_id", "brand", "storage_variant", "category",
+    "units_sold", "revenue", "stock", "discount", "is_festival",
+    "views", "clicks", "add_to_cart", "purchases", "bounce_rate",
+    "flipkart_price", "amazon_price", "myntra_price",
+    "day_of_week", "month", "is_weekend",
+    "price_lag1", "price_rolling1", "price_lag7", "price_rolling7",
+    "flipkart_price_lag1", "flipkart_price_lag7",
+    "amazon_price_lag1", "amazon_price_lag7",
+    "myntra_price_lag1", "myntra_price_lag7",
+    "predicted_price",
+]
+
+
+def _behavior_where(products):
+    if products:
+        return sql.SQL("WHERE f.product_id = ANY(%(products)s)")
+    return sql.SQL("")
+
+
+def _behavior_column(col):
+    if col not in BEHAVIOR_COLUMNS:
+        raise ValueError(f"Unknown column {col!r}")
+    table = "p" if col == "predicted_price" else "f"
+    return sql.Identifier(table, col)
+
+
+def behavior_count(conn, products=()):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            sql.SQL("SELECT count(*) FROM daily_features f {}").format(_behavior_where(products)),
+            {"products": list(products)},
+        )
+        return cursor.fetchone()[0]
+
+
+def behavior_page(conn, columns, sort_col="date", descending=False, products=(), page=1, page_size=50):
+    """One page of the behavior grid: projected columns, SQL-side filter, sort and LIMIT/OFFSET."""
+    columns = [col for col in BEHAVIOR_COLUMNS if col in columns] or ["date", "product_id"]
+    direction = sql.SQL("DESC" if descending else "ASC")
+    query = sql.SQL("""
+        SELECT {columns}
+        FROM daily_features f
+        LEFT JOIN predicted_prices p USING (date, product_id)
+        {where}
+        ORDER BY {sort} {direction} NULLS LAST, f.date, f.product_id
+        LIMIT %(limit)s OFFSET %(offset)s
+    """).format(
+        columns=sql.SQL(", ").join(
+            sql.SQL("{} AS {}").format(_behavior_column(col), sql.Identifier(col)) for col in columns
+        ),
+        where=_behavior_where(products),
+        sort=_behavior_column(sort_col),
+        direction=direction,
+    )
+    params = {"products": list(products), "limit": page_size, "offset": (max(page, 1) - 1) * page_size}
+    return _read(conn, query.as_string(conn), params, date_cols=["date"] if "date" in columns else ())
+
+
+def funnel_totals(conn):
+    """Views, clicks, add-to-cart and purchases summed in one pass."""
+    with conn.cursor() as cursor:
+        cursor.execute("""
+            SELECT COALESCE(sum(views), 0), COALESCE(sum(clicks), 0),
+                   COALESCE(sum(add_to_cart), 0), COALESCE(sum(purchases), 0)
+            FROM rollup_totals
+        """)
+        views, clicks, add_to_cart, purchases = cursor.fetchone()
+    return {"views": float(views), "clicks": float(clicks),
+            "add_to_cart": float(add_to_cart), "purchases": float(purchases)}
@@ -0,0 +1,73 @@
+"""Throughput of the shared feature pipeline (pricing.features.build_features).
+
+Usage:
+    python benchmarks/bench_features.py                 # 10k, 1M and 10M rows
+    python benchmarks/bench_features.py --sizes 10000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pricing.features import build_features
+
+DAYS = 365
+BRANDS = np.array(["Samsung", "Redmi", "Realme", "iQOO", "OnePlus", "Motorola", "Vivo", "Oppo", "Poco", "Infinix"])
+STORAGE = np.array(["64GB", "128GB", "256GB"])
+
+
+def make_frame(n_rows, seed=42):
+    """Random rows shaped like final_preprocessed_dataset.csv, one year per product."""
+    rng = np.random.default_rng(seed)
+    n_products = max(1, n_rows // DAYS)
+    product_idx = np.arange(n_rows) % n_products
+    day_idx = np.arange(n_rows) // n_products
+    price = rng.integers(10000, 30000, n_rows)
+    units_sold = rng.integers(1, 40, n_rows)
+    return pd.DataFrame({
+        "date": np.datetime64("2024-01-01") + day_idx.astype("timedelta64[D]"),
+        "product_id": np.char.add("M", (product_idx + 100).astype(str)),
+        "brand": BRANDS[product_idx % len(BRANDS)],
+        "storage_variant": STORAGE[product_idx % len(STORAGE)],
+        "category": "Mobile",
+        "price": price,
+        "units_sold": units_sold,
+        "revenue": price * units_sold,
+        "stock": rng.integers(30, 150, n_rows),
+        "discount": rng.choice([0, 5, 10], n_rows),
+        "views": rng.integers(100, 700, n_rows),
+        "clicks": rng.integers(30, 100, n_rows),
+        "add_to_cart": rng.integers(0, 70, n_rows),
+        "purchases": units_sold,
+        "bounce_rate": rng.uniform(20, 80, n_rows).round(2),
+        "flipkart_price": (price * rng.uniform(0.95, 1.10, n_rows)).astype(int),
+        "amazon_price": (price * rng.uniform(0.90, 1.12, n_rows)).astype(int),
+        "myntra_price": (price * rng.uniform(0.92, 1.08, n_rows)).astype(int),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'best s':>10} {'rows/sec':>14}")
+    for n_rows in args.sizes:
+        df = make_frame(n_rows)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            build_features(df)
+            timings.append(time.perf_counter() - start)
+        best = min(timings)
+        print(f"{n_rows:>12,} {best:>10.3f} {n_rows / best:>14,.0f}")
+        del df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""End-to-end stage benchmarks across catalog sizes, with regression checks.
+
+Each catalog size gets ``--days`` of synthetic rows; every stage records its
+wall time and the process's peak RSS while it ran. Database stages run against
+a throw-away ``bench`` schema in the database from ``pricing.config``
+(point the PG* variables at a local PostgreSQL), so real tables are untouched.
+
+Usage:
+    python benchmarks/bench_pipeline.py --products 100 1000 10000 --out benchmarks/results/latest.json
+    python benchmarks/bench_pipeline.py --out new.json --compare benchmarks/results/baseline.json --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "app"))
+import data_access
+from pricing.config import DB_CONFIG
+from pricing.feature_store import FeatureStore
+from pricing.features import build_features
+from pricing.instrumentation import StageRecorder
+from pricing.loader import copy_upsert
+from pricing.model_bundle import ModelBundle
+from pricing.recommendations import refresh_recommendations
+from pricing.rollups import refresh_rollups
+from pricing.schema import FEATURE_COLUMNS, ensure_tables, record_load
+from pricing.synthetic import catalog, daily_rows, generate
+
+# data_access reads through pandas with a raw psycopg2 connection, as the dashboard does
+warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+
+BENCH_SCHEMA = "bench"
+DASHBOARD_PAGES = {
+    "dashboard_filters": lambda conn, start, end, products: (
+        data_access.date_bounds(conn), data_access.product_ids(conn)),
+    "dashboard_sales": lambda conn, start, end, products: (
+        data_access.kpi_totals(conn),
+        data_access.sales_trends(conn, start, end, products),
+        data_access.product_performance(conn, start, end, products)),
+    "dashboard_competitor": lambda conn, start, end, products: data_access.competitor_prices(conn),
+    "dashboard_recommendations": lambda conn, start, end, products: data_access.price_recommendations(conn),
+    "dashboard_behavior": lambda conn, start, end, products: (
+        data_access.behavior_count(conn),
+        data_access.behavior_page(conn, data_access.BEHAVIOR_COLUMNS, "date", True, (), 1, 50),
+        data_access.funnel_totals(conn)),
+}
+
+
+def stage_results(recorder):
+    """``{stage: {seconds, rows, rows_per_sec, peak_rss_mb}}`` from a recorder's stages."""
+    results = {}
+    for stage in recorder.stages:
+        record = stage.as_dict()
+        del record["stage"]
+        results[stage.name] = record
+    return results
+
+
+def connect_bench():
+    import psycopg2
+
+    conn = psycopg2.connect(**DB_CONFIG, options=f"-c search_path={BENCH_SCHEMA}")
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+        ensure_tables(cursor)
+    conn.commit()
+    return conn
+
+
+def run_size(n_products, days, use_db):
+    # Only the recorded stages are used: finish() (log line, metrics file) is never called.
+    recorder = StageRecorder("bench")
+    start, end = pd.Timestamp("2024-01-01"), pd.Timestamp("2024-01-01") + pd.Timedelta(days=days - 1)
+    n_rows = n_products * days
+    products = catalog(n_products)
+
+    with recorder.stage("generate", n_rows):
+        df = daily_rows(next(generate(products, start, end, seed=42, chunk_days=days)))
+
+    with recorder.stage("features", n_rows):
+        build_features(df[["date", "product_id", "brand", "storage_variant", "category", "price",
+                           "flipkart_price", "amazon_price", "myntra_price"]])
+
+    with recorder.stage("lag_fill", n_rows):
+        store = FeatureStore()
+        df = df.join(pd.concat([store.advance(day_df) for _, day_df in df.groupby("date", sort=True)]))
+
+    with recorder.stage("model_load", 1):
+        bundle = ModelBundle.load()
+
+    with recorder.stage("predict", n_rows):
+        df["predicted_price"] = bundle.predict(df)
+
+    if use_db:
+        conn = connect_bench()
+        try:
+            with recorder.stage("upsert_daily_features", n_rows):
+                copy_upsert(conn, "daily_features", df, FEATURE_COLUMNS)
+                conn.commit()
+            with recorder.stage("upsert_predicted_prices", n_rows):
+                copy_upsert(conn, "predicted_prices", df, ["date", "product_id", "predicted_price"])
+                conn.commit()
+            with recorder.stage("rollups", n_rows):
+                refresh_rollups(conn, start.date(), end.date())
+                conn.commit()
+            with recorder.stage("recommendations", n_products):
+                with conn.cursor() as cursor:
+                    record_load(cursor, start.date(), end.date(), n_rows)
+                refresh_recommendations(conn)
+                conn.commit()
+            with conn.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            conn.commit()
+
+            selected = tuple(products["product_id"][:3])
+            for page, run in DASHBOARD_PAGES.items():
+                with recorder.stage(page, n_rows):
+                    run(conn, start.date(), end.date(), selected)
+        finally:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            conn.commit()
+            conn.close()
+    return stage_results(recorder)
+
+
+def best_of(runs):
+    """Fastest time of each stage across runs, with the largest peak RSS seen."""
+    best = {}
+    for stage in runs[0]:
+        fastest = min((run[stage] for run in runs), key=lambda r: r["seconds"])
+        peaks = [run[stage]["peak_rss_mb"] for run in runs if run[stage]["peak_rss_mb"] is not None]
+        best[stage] = {**fastest, "peak_rss_mb": max(peaks, default=None)}
+    return best
+
+
+def compare(results, baseline, threshold, min_delta=0.02):
+    """Lines describing each stage vs. the baseline, and the number of regressions."""
+    lines, regressions = [], 0
+    for size, stages in results["results"].items():
+        base_stages = baseline["results"].get(size, {})
+        for stage, current in stages.items():
+            if stage not in base_stages:
+                continue
+            before, after = base_stages[stage]["seconds"], current["seconds"]
+            change = (after - before) / before if before else 0.0
+            regressed = change > threshold and after - before > min_delta
+            regressions += regressed
+            flag = "REGRESSION" if regressed else ("faster" if change < -threshold else "")
+            lines.append(f"{size:>8} {stage:<26} {before:>9.3f}s -> {after:>9.3f}s {change:>+8.1%} {flag}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the fastest run of each stage is kept")
+    parser.add_argument("--no-db", action="store_true", help="skip the PostgreSQL and dashboard stages")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.20, help="relative slowdown flagged as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.02,
+                        help="ignore slowdowns smaller than this many seconds (timer noise)")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count(),
+            "days": args.days,
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    print(f"{'products':>8} {'stage':<26} {'seconds':>9} {'rows/sec':>14} {'peak RSS MB':>12}")
+    for n_products in args.products:
+        stages = best_of([run_size(n_products, args.days, not args.no_db) for _ in range(args.repeat)])
+        results["results"][str(n_products)] = stages
+        for stage, r in stages.items():
+            rate = "n/a" if r["rows_per_sec"] is None else f"{r['rows_per_sec']:,.0f}"
+            rss = "n/a" if r["peak_rss_mb"] is None else f"{r['peak_rss_mb']:.1f}"
+            print(f"{n_products:>8} {stage:<26} {r['seconds']:>9.3f} {rate:>14} {rss:>12}")
+
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressions = compare(results, baseline, args.threshold, args.min_delta)
+        print("\n".join(lines))
+        if regressions:
+            print(f"❌ {regressions} stage(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"✅ No stage regressed by more than {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared building blocks for the Dynamic Pricing Engine scripts and dashboard."""
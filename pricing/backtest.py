@@ -0,0 +1,240 @@
+"""Rolling-origin backtest over the preprocessed dataset.
+
+The feature matrix is built once, saved as ``.npy`` files under
+``data/cache/backtest/`` and memory-mapped by every worker, so folds never
+rebuild lags or copy the data. Fold ``i`` trains on every row before its
+origin and tests on the ``horizon`` days that follow; origins step back
+from the end of the data one horizon at a time. A fixed model (``--model``)
+is only tested on days after its training cutoff (``train_cutoff`` in the
+bundle metadata, or ``--train-cutoff``): its origins step forward from the
+cutoff, so no test window overlaps the rows it was fit on. Folds run in a
+process pool and the report (per-fold R²/MAE/RMSE, row counts and timings)
+is JSON.
+
+Usage:
+    python -m pricing.backtest --folds 6 --horizon 30 --workers 3 --out backtest.json
+    python -m pricing.backtest --model model/price_model_v1/model.ubj   # score a fixed model
+    python -m pricing.backtest --model notebooks/xgb_price_model.json --train-cutoff 2024-10-01
+"""
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import xgboost as xgb
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+from pricing.datasets import CACHE_DIR, build_cache, cache_path, is_fresh, load_dataset
+from pricing.features import TRAINED_FEATURES, build_features
+from pricing.model_bundle import read_manifest
+from pricing.parallel_scoring import threads_per_worker
+from pricing.train import EARLY_STOPPING_ROUNDS, NUM_BOOST_ROUND, PARAMS
+
+MATRIX_DIR = os.path.join(CACHE_DIR, "backtest")
+MATRIX_FILES = ("X.npy", "y.npy", "days.npy")
+VALID_DAYS = 30     # tail of each training window used for early stopping
+
+_matrix = None
+
+
+# ---------- SHARED FEATURE MATRIX ----------
+def build_matrix(dataset="preprocessed"):
+    """Build (or reuse) the cached float32 feature matrix; returns its directory."""
+    if not is_fresh(dataset):
+        build_cache(dataset)
+    paths = [os.path.join(MATRIX_DIR, name) for name in MATRIX_FILES]
+    source_mtime = os.path.getmtime(cache_path(dataset))
+    if all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in paths):
+        return MATRIX_DIR
+
+    df = build_features(load_dataset(dataset))
+    os.makedirs(MATRIX_DIR, exist_ok=True)
+    arrays = (
+        df[TRAINED_FEATURES].to_numpy(dtype=np.float32),
+        df["price"].to_numpy(dtype=np.float32),
+        df["date"].to_numpy().astype("datetime64[D]").astype(np.int32),
+    )
+    for path, array in zip(paths, arrays):
+        np.save(path + ".tmp.npy", array)
+        os.replace(path + ".tmp.npy", path)
+    return MATRIX_DIR
+
+
+def load_matrix(matrix_dir=MATRIX_DIR):
+    return tuple(np.load(os.path.join(matrix_dir, name), mmap_mode="r") for name in MATRIX_FILES)
+
+
+def fold_origins(days, n_folds, horizon, first_origin=None):
+    """Origins (as day numbers), oldest first.
+
+    By default the last fold ends at the last day. With ``first_origin`` the
+    folds start there instead and step forward; only whole windows that fit
+    in the data are kept (at most ``n_folds``).
+    """
+    last = int(days.max()) + 1
+    if first_origin is None:
+        return [last - horizon * k for k in range(n_folds, 0, -1)]
+    origins = [first_origin + horizon * k for k in range(n_folds) if first_origin + horizon * (k + 1) <= last]
+    if not origins:
+        raise ValueError(f"No {horizon}-day test window fits between {np.datetime64(first_origin, 'D')} "
+                         f"and the end of the data ({np.datetime64(last - 1, 'D')})")
+    return origins
+
+
+def train_cutoff(model_path):
+    """First date the model at ``model_path`` was not trained on, from its bundle manifest (or ``None``)."""
+    bundle_dir = os.path.dirname(os.path.abspath(model_path))
+    if not os.path.exists(os.path.join(bundle_dir, "bundle.json")):
+        return None
+    return read_manifest(bundle_dir).get("metadata", {}).get("train_cutoff")
+
+
+# ---------- FOLDS ----------
+def _init_worker(matrix_dir, nthread):
+    global _matrix
+    _matrix = load_matrix(matrix_dir) + (nthread,)
+
+
+def _metrics(y_true, y_pred, prefix):
+    return {
+        f"{prefix}_r2": float(r2_score(y_true, y_pred)),
+        f"{prefix}_mae": float(mean_absolute_error(y_true, y_pred)),
+        f"{prefix}_rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+    }
+
+
+def run_fold(fold, origin, horizon, model_path=None):
+    """Train (or load ``model_path``) on rows before ``origin`` and test on the next ``horizon`` days."""
+    X, y, days, nthread = _matrix
+    start = time.perf_counter()
+    train_idx = np.flatnonzero(days < origin)
+    test_idx = np.flatnonzero((days >= origin) & (days < origin + horizon))
+    if len(train_idx) == 0:
+        raise ValueError(f"Fold {fold} has no training rows before {np.datetime64(origin, 'D')}; "
+                         f"use fewer folds or a shorter horizon")
+    X_train, y_train = X[train_idx], y[train_idx]
+    X_test, y_test = X[test_idx], y[test_idx]
+
+    train_start = time.perf_counter()
+    if model_path:
+        booster = xgb.Booster()
+        booster.load_model(model_path)
+        booster.set_param({"nthread": nthread})
+        best_iteration = None
+    else:
+        fit = days[train_idx] < origin - VALID_DAYS
+        if not fit.any():
+            raise ValueError(f"Fold {fold} has no training rows before its {VALID_DAYS}-day early-stopping tail "
+                             f"({np.datetime64(origin - VALID_DAYS, 'D')}); use fewer folds or a shorter horizon")
+        dtrain = xgb.DMatrix(X_train[fit], label=y_train[fit], feature_names=TRAINED_FEATURES)
+        dvalid = xgb.DMatrix(X_train[~fit], label=y_train[~fit], feature_names=TRAINED_FEATURES)
+        booster = xgb.train(
+            {**PARAMS, "nthread": nthread}, dtrain, NUM_BOOST_ROUND,
+            evals=[(dvalid, "valid")], early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False,
+        )
+        best_iteration = booster.best_iteration
+    train_sec = time.perf_counter() - train_start
+
+    predict_start = time.perf_counter()
+    iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+    train_preds = booster.inplace_predict(X_train, iteration_range=iteration_range)
+    test_preds = booster.inplace_predict(X_test, iteration_range=iteration_range)
+    predict_sec = time.perf_counter() - predict_start
+
+    return {
+        "fold": fold,
+        "train_end": str(np.datetime64(origin - 1, "D")),
+        "test_start": str(np.datetime64(origin, "D")),
+        "test_end": str(np.datetime64(origin + horizon - 1, "D")),
+        "train_rows": len(train_idx),
+        "test_rows": len(test_idx),
+        "best_iteration": best_iteration,
+        **_metrics(y_train, train_preds, "train"),
+        **_metrics(y_test, test_preds, "test"),
+        "train_seconds": train_sec,
+        "predict_seconds": predict_sec,
+        "fold_seconds": time.perf_counter() - start,
+    }
+
+
+def backtest(n_folds=6, horizon=30, workers=None, model_path=None, dataset="preprocessed", cutoff=None):
+    """Run every fold in a process pool and return the JSON-ready report.
+
+    A fixed ``model_path`` needs its training ``cutoff`` (ISO date), read
+    from the bundle manifest next to it when not given.
+    """
+    if model_path and cutoff is None:
+        cutoff = train_cutoff(model_path)
+        if cutoff is None:
+            raise ValueError(f"Training cutoff of {model_path} is unknown; pass cutoff (--train-cutoff) "
+                             f"so the model is not scored on its own training rows")
+    start = time.perf_counter()
+    matrix_dir = build_matrix(dataset)
+    matrix_sec = time.perf_counter() - start
+
+    days = load_matrix(matrix_dir)[2]
+    first_origin = int(np.datetime64(cutoff, "D").astype(np.int64)) if model_path else None
+    origins = fold_origins(days, n_folds, horizon, first_origin)
+    workers = workers or min(len(origins), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(matrix_dir, threads_per_worker(workers))) as pool:
+        futures = [pool.submit(run_fold, i, origin, horizon, model_path) for i, origin in enumerate(origins)]
+        folds = [future.result() for future in futures]
+
+    summary = {
+        key: float(np.mean([fold[key] for fold in folds]))
+        for key in ("train_r2", "test_r2", "test_mae", "test_rmse", "fold_seconds")
+    }
+    return {
+        "dataset": dataset,
+        "model": model_path or "retrained per fold",
+        "params": None if model_path else PARAMS,
+        "train_cutoff": cutoff if model_path else None,
+        "folds_requested": n_folds,
+        "horizon_days": horizon,
+        "workers": workers,
+        "matrix_seconds": matrix_sec,
+        "wall_seconds": time.perf_counter() - start,
+        "summary": summary,
+        "folds": folds,
+    }
+
+
+def format_report(report):
+    lines = [f"{'fold':>4}  {'test window':<22} {'train':>7} {'test':>6} {'R²':>7} {'MAE':>9} {'RMSE':>9} {'sec':>6}"]
+    for f in report["folds"]:
+        lines.append(
+            f"{f['fold']:>4}  {f['test_start'] + '..' + f['test_end']:<22} {f['train_rows']:>7} {f['test_rows']:>6} "
+            f"{f['test_r2']:>7.4f} {f['test_mae']:>9.2f} {f['test_rmse']:>9.2f} {f['fold_seconds']:>6.2f}"
+        )
+    s = report["summary"]
+    lines.append(f"mean test R² {s['test_r2']:.4f}, MAE {s['test_mae']:.2f}, RMSE {s['test_rmse']:.2f}; "
+                 f"wall {report['wall_seconds']:.2f}s on {report['workers']} workers")
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel rolling-origin backtest")
+    parser.add_argument("--folds", type=int, default=6)
+    parser.add_argument("--horizon", type=int, default=30, help="test window length in days")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--model", help="score this saved model on every fold instead of retraining")
+    parser.add_argument("--train-cutoff", help="first date --model was not trained on (default: from its bundle)")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    report = backtest(args.folds, args.horizon, args.workers, args.model, cutoff=args.train_cutoff)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(format_report(report))
+        print(f"Report written to {args.out}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Connection settings shared by the daily job, loaders and dashboard.
+
+Defaults match the local development database; the standard ``PG*``
+environment variables override them.
+"""
+import os
+
+DB_CONFIG = {
+    "host": os.environ.get("PGHOST", "localhost"),
+    "port": int(os.environ.get("PGPORT", 5432)),
+    "user": os.environ.get("PGUSER", "postgres"),
+    "password": os.environ.get("PGPASSWORD", "hiba0702"),
+    "database": os.environ.get("PGDATABASE", "pricing_engine"),
+}
+
+# "plain" tables, or "partitioned" (monthly range partitions on date); see pricing/schema.py
+SCHEMA_MODE = os.environ.get("PRICING_SCHEMA_MODE", "plain")
+
+# Worker processes for batch scoring; >1 shards rows by product_id (see pricing/parallel_scoring.py)
+SCORING_WORKERS = int(os.environ.get("PRICING_SCORING_WORKERS", 1))
+
+# Stage instrumentation of the daily job (see pricing/instrumentation.py): Prometheus textfile
+# path, and an optional deep-dive profiler ("cprofile" or "tracemalloc") dumped to PROFILE_DIR
+METRICS_FILE = os.environ.get("PRICING_METRICS_FILE") or None
+PROFILE = os.environ.get("PRICING_PROFILE") or None
+PROFILE_DIR = os.environ.get("PRICING_PROFILE_DIR", os.path.join("data", "profiles"))
+
+# Lag state of the daily job (see pricing/feature_store.py); default: data/state/feature_store.npz
+FEATURE_STORE = os.environ.get("PRICING_FEATURE_STORE") or None
+
+# Registered model version to score with (see pricing/registry.py); default: the registry's current one
+MODEL_VERSION = os.environ.get("PRICING_MODEL_VERSION") or None
+
+# Append-only JSONL stream of competitor price updates consumed by pricing/repricing.py
+PRICE_STREAM = os.environ.get("PRICING_PRICE_STREAM", os.path.join("data", "stream", "competitor_prices.jsonl"))
@@ -0,0 +1,137 @@
+"""Columnar cache for the raw and preprocessed CSV datasets.
+
+Each CSV is converted once into a zstd-compressed Parquet file under
+``data/cache/``. String columns are dictionary-encoded (with a sorted
+dictionary, so category codes match ``astype("category")``), integers are
+downcast to the smallest type whose range holds the column's min and max,
+and floats become float32 only when that is lossless. Narrow integers can
+wrap in arithmetic: cast to float or int64 before multiplying or summing
+them (the feature and model code already reads them as float). Loads are
+memory-mapped and accept column and row-filter projection. The cache is
+rebuilt automatically whenever the source CSV's size or modification time
+changes.
+
+Usage:
+    python -m pricing.datasets            # build / refresh every cache file
+"""
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.path.join(ROOT, "data", "cache")
+CACHE_VERSION = "3"
+
+DATASETS = {
+    "sales": "data/raw/mobile_sales_2024.csv",
+    "behavior": "data/raw/customer_behavior_2024.csv",
+    "competitors": "data/raw/competitor_prices_2024.csv",
+    "preprocessed": "data/preprocessing/final_preprocessed_dataset.csv",
+}
+
+DICTIONARY_COLS = {"product_id", "product_name", "brand", "storage_variant", "category"}
+
+
+def source_path(name):
+    return os.path.join(ROOT, DATASETS[name])
+
+
+def cache_path(name):
+    return os.path.join(CACHE_DIR, f"{name}.parquet")
+
+
+def _fingerprint(path):
+    stat = os.stat(path)
+    return {
+        b"source_size": str(stat.st_size).encode(),
+        b"source_mtime_ns": str(stat.st_mtime_ns).encode(),
+        b"cache_version": CACHE_VERSION.encode(),
+    }
+
+
+def is_fresh(name):
+    path = cache_path(name)
+    if not os.path.exists(path):
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    expected = _fingerprint(source_path(name))
+    return all(metadata.get(key) == value for key, value in expected.items())
+
+
+# ---------- CONVERSION ----------
+def _sorted_dictionary(column):
+    values = column.combine_chunks()
+    dictionary = pc.unique(values)
+    dictionary = dictionary.take(pc.sort_indices(dictionary))
+    indices = pc.index_in(values, value_set=dictionary).cast(pa.int32())
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def _downcast(column):
+    values = column.combine_chunks()
+    if pa.types.is_integer(values.type) and values.null_count < len(values):
+        lo, hi = pc.min(values).as_py(), pc.max(values).as_py()
+        for candidate in (np.int8, np.int16, np.int32):
+            info = np.iinfo(candidate)
+            if info.min <= lo and hi <= info.max:
+                return values.cast(pa.from_numpy_dtype(candidate))
+    if pa.types.is_float64(values.type):
+        as_f32 = values.cast(pa.float32(), safe=False)
+        if pc.all(pc.equal(as_f32.cast(pa.float64()), values)).as_py():
+            return as_f32
+    return values
+
+
+def build_cache(name):
+    """Convert one CSV into its typed Parquet cache file."""
+    src = source_path(name)
+    table = pv.read_csv(src)
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        if field.name in DICTIONARY_COLS:
+            columns.append(_sorted_dictionary(column.cast(pa.string())))
+        elif field.name == "date":
+            columns.append(column.cast(pa.date32()))
+        else:
+            columns.append(_downcast(column))
+    table = pa.Table.from_arrays(columns, names=table.column_names)
+    table = table.replace_schema_metadata(_fingerprint(src))
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = cache_path(name) + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, cache_path(name))
+    return cache_path(name)
+
+
+# ---------- LOADING ----------
+def load_dataset(name, columns=None, filters=None):
+    """Load a dataset as a DataFrame, (re)building its Parquet cache if stale.
+
+    ``columns`` limits the columns read; ``filters`` is a pyarrow predicate
+    list such as ``[("date", ">=", date(2024, 10, 1))]``. Dictionary columns
+    come back as pandas categoricals and ``date`` as datetime64.
+    """
+    if not is_fresh(name):
+        build_cache(name)
+    table = pq.read_table(cache_path(name), columns=columns, filters=filters, memory_map=True)
+    return table.to_pandas(date_as_object=False)
+
+
+def main():
+    for name in DATASETS:
+        rebuilt = not is_fresh(name)
+        if rebuilt:
+            build_cache(name)
+        csv_size = os.path.getsize(source_path(name))
+        cache_size = os.path.getsize(cache_path(name))
+        status = "rebuilt" if rebuilt else "fresh"
+        print(f"{name:<13} {status:<8} {csv_size / 1024:>8.0f} KiB csv -> {cache_size / 1024:>6.0f} KiB parquet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Persistent per-product lag state for the daily prediction job.
+
+The store keeps the last ``WINDOW`` days of our price and the competitor
+prices for every product in one ``(products, series, days)`` float array, so
+lag and rolling features for a new date come from a single array lookup
+instead of re-reading and re-shifting the whole history window.
+"""
+import io
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pricing.config import FEATURE_STORE
+
+SERIES = ["price", "flipkart_price", "amazon_price", "myntra_price"]
+WINDOW = 7
+
+DEFAULT_PATH = FEATURE_STORE or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data", "state", "feature_store.npz"
+)
+
+
+class FeatureStore:
+    """Rolling window of the last ``WINDOW`` daily values per product.
+
+    ``history[i, s, -1]`` is the value of ``SERIES[s]`` for product
+    ``product_ids[i]`` on ``last_date``; missing days are NaN.
+    """
+
+    def __init__(self, product_ids=None, history=None, last_date=None):
+        self.product_ids = pd.Index([] if product_ids is None else list(product_ids), dtype=object)
+        if history is None:
+            history = np.full((len(self.product_ids), len(SERIES), WINDOW), np.nan)
+        self.history = history
+        self.last_date = last_date
+
+    # ---------- PERSISTENCE ----------
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        if not os.path.exists(path):
+            return cls()
+        return cls._read(path)
+
+    @classmethod
+    def from_bytes(cls, payload):
+        return cls._read(io.BytesIO(payload))
+
+    @classmethod
+    def _read(cls, source):
+        with np.load(source, allow_pickle=False) as data:
+            last_date = str(data["last_date"])
+            return cls(
+                product_ids=data["product_ids"].astype(str).tolist(),
+                history=data["history"],
+                last_date=date.fromisoformat(last_date) if last_date else None,
+            )
+
+    def save(self, path=DEFAULT_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            self._write(f)
+        os.replace(tmp_path, path)
+
+    def to_bytes(self):
+        """The same ``.npz`` payload as ``save``, e.g. for a checkpoint row in the database."""
+        buf = io.BytesIO()
+        self._write(buf)
+        return buf.getvalue()
+
+    def _write(self, f):
+        np.savez(
+            f,
+            product_ids=np.asarray(self.product_ids, dtype=str),
+            history=self.history,
+            last_date=np.str_(self.last_date.isoformat() if self.last_date else ""),
+        )
+
+    # ---------- STATE UPDATES ----------
+    def _add_products(self, product_ids):
+        new_ids = pd.Index(pd.unique(np.asarray(product_ids, dtype=object))).difference(self.product_ids)
+        if len(new_ids) == 0:
+            return
+        self.product_ids = self.product_ids.append(new_ids)
+        padding = np.full((len(new_ids), len(SERIES), WINDOW), np.nan)
+        self.history = np.concatenate([self.history, padding])
+
+    def _shift(self, days):
+        if days <= 0:
+            return
+        if days >= WINDOW:
+            self.history[:] = np.nan
+            return
+        self.history[:, :, :-days] = self.history[:, :, days:]
+        self.history[:, :, -days:] = np.nan
+
+    def advance(self, day_df):
+        """Return lag features for one date and push its values into the store.
+
+        ``day_df`` holds one row per product for a single ``date`` with the
+        columns in ``SERIES``. The result is aligned to ``day_df.index``;
+        lags without enough history are 0, as in the original daily job.
+        """
+        day = pd.Timestamp(day_df["date"].iloc[0]).date()
+        if self.last_date is not None and day <= self.last_date:
+            raise ValueError(f"Feature store already holds {self.last_date}; cannot advance to {day}")
+
+        self._add_products(day_df["product_id"])
+        if self.last_date is not None:
+            self._shift((day - self.last_date).days - 1)
+
+        idx = self.product_ids.get_indexer(day_df["product_id"])
+        window = self.history[idx]
+
+        lags = {}
+        for s, col in enumerate(SERIES):
+            lags[f"{col}_lag1"] = window[:, s, -1]
+            lags[f"{col}_lag7"] = window[:, s, 0]
+        lags["price_rolling1"] = window[:, 0, -1]
+        lags["price_rolling7"] = window[:, 0, :].mean(axis=1)
+        lags = pd.DataFrame(lags, index=day_df.index).fillna(0)
+
+        self._shift(1)
+        self.history[idx, :, -1] = day_df[SERIES].to_numpy(dtype=float)
+        self.last_date = day
+        return lags
@@ -0,0 +1,107 @@
+"""Feature engineering shared by training, evaluation and daily scoring.
+
+Every column in ``TRAINED_FEATURES`` is built from one ``(product_id, date)``
+sort: lags are grouped NumPy shifts and rolling means are window sums over a
+prefix-sum array, so windows never cross product boundaries.
+"""
+import numpy as np
+import pandas as pd
+
+# ---------- FEATURES ----------
+TRAINED_FEATURES = [
+    "product_id", "brand", "storage_variant", "category", "units_sold",
+    "revenue", "stock", "discount", "views", "clicks", "add_to_cart",
+    "purchases", "bounce_rate", "flipkart_price", "amazon_price",
+    "myntra_price", "day_of_week", "month", "is_weekend",
+    "price_lag1", "price_rolling1", "price_lag7", "price_rolling7",
+    "flipkart_price_lag1", "flipkart_price_lag7",
+    "amazon_price_lag1", "amazon_price_lag7",
+    "myntra_price_lag1", "myntra_price_lag7"
+]
+
+CAT_COLS = ["product_id", "brand", "storage_variant", "category"]
+COMPETITOR_COLS = ["flipkart_price", "amazon_price", "myntra_price"]
+LAG_COLS = [col for col in TRAINED_FEATURES if "lag" in col or "rolling" in col]
+LAGS = [1, 7]
+
+
+# ---------- GROUPED ARRAY PRIMITIVES ----------
+def group_positions(keys):
+    """Position of each row within its run of equal ``keys`` (keys must be sorted)."""
+    n = len(keys)
+    starts = np.ones(n, dtype=bool)
+    if n:
+        starts[1:] = keys[1:] != keys[:-1]
+    start_idx = np.flatnonzero(starts)
+    run_lengths = np.diff(np.append(start_idx, n))
+    return np.arange(n) - np.repeat(start_idx, run_lengths)
+
+
+def grouped_shift(values, positions, lag):
+    """``groupby(...).shift(lag)`` on a group-sorted float array."""
+    out = np.full(len(values), np.nan)
+    if lag < len(values):
+        out[lag:] = values[:-lag]
+    out[positions < lag] = np.nan
+    return out
+
+
+def grouped_rolling_mean(values, positions, window):
+    """Mean of the ``window`` values before each row (``shift(1).rolling(window)``)."""
+    prefix = np.concatenate([[0.0], np.cumsum(values, dtype=float)])
+    out = np.full(len(values), np.nan)
+    # row r averages values[r - window:r], i.e. prefix[r] - prefix[r - window]
+    rows = np.flatnonzero(positions >= window)
+    out[rows] = (prefix[rows] - prefix[rows - window]) / window
+    return out
+
+
+# ---------- FRAME BUILDERS ----------
+def add_date_features(df):
+    dates = pd.to_datetime(df["date"])
+    df["day_of_week"] = dates.dt.dayofweek
+    df["month"] = dates.dt.month
+    df["is_weekend"] = (df["day_of_week"] >= 5).astype(int)
+    return df
+
+
+def encode_categoricals(df, cols=CAT_COLS):
+    for col in cols:
+        df[col] = df[col].astype("category").cat.codes
+    return df
+
+
+def add_lag_features(df, price_col="price", fill_value=None):
+    """Sort by ``(product_id, date)`` and add every column in ``LAG_COLS``.
+
+    With ``fill_value=None`` rows without a full 7-day history are dropped,
+    matching training; otherwise missing lags are filled with ``fill_value``.
+    """
+    df = df.sort_values(["product_id", "date"], kind="stable").reset_index(drop=True)
+    positions = group_positions(df["product_id"].to_numpy())
+
+    lags = {}
+    price = df[price_col].to_numpy(dtype=float)
+    for lag in LAGS:
+        lags[f"price_lag{lag}"] = grouped_shift(price, positions, lag)
+        lags[f"price_rolling{lag}"] = grouped_rolling_mean(price, positions, lag)
+    for col in COMPETITOR_COLS:
+        values = df[col].to_numpy(dtype=float)
+        for lag in LAGS:
+            lags[f"{col}_lag{lag}"] = grouped_shift(values, positions, lag)
+
+    for col in LAG_COLS:
+        df[col] = lags[col]
+    if fill_value is None:
+        return df[positions >= max(LAGS)].reset_index(drop=True)
+    df[LAG_COLS] = df[LAG_COLS].fillna(fill_value)
+    return df
+
+
+def build_features(df, price_col="price", fill_value=None):
+    """Full pipeline: date parts, categorical codes and lag/rolling columns."""
+    df = df.copy()
+    df["date"] = pd.to_datetime(df["date"])
+    df = add_date_features(df)
+    df = encode_categoricals(df)
+    return add_lag_features(df, price_col=price_col, fill_value=fill_value)
@@ -0,0 +1,192 @@
+"""Stage-level timing and memory instrumentation for batch jobs.
+
+``StageRecorder.stage`` wraps one step of a job and records its wall time,
+rows, rows/sec and peak RSS (the kernel's high-water mark is reset before
+every stage on Linux). ``finish`` prints one JSON log line and writes a
+Prometheus textfile-collector file. Set ``PRICING_PROFILE=cprofile`` or
+``PRICING_PROFILE=tracemalloc`` to also dump a profile of the whole run to
+``PRICING_PROFILE_DIR``.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_DIR = os.path.join(ROOT, "data", "metrics")
+PROFILE_DIR = os.path.join(ROOT, "data", "profiles")
+PROFILERS = ("cprofile", "tracemalloc")
+TRACEMALLOC_TOP = 30
+
+
+# ---------- MEMORY ----------
+def reset_peak_rss():
+    """Reset the kernel's peak-RSS counter (Linux); returns False where unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb():
+    """Peak RSS since the last reset (or since start-up where it cannot be reset).
+
+    ``None`` where the platform offers neither ``/proc`` nor ``resource`` (Windows).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux and the BSDs.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def format_rss(mb):
+    return "n/a" if mb is None else f"{mb:,.0f} MB"
+
+
+# ---------- RECORDER ----------
+class Stage:
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = 0.0
+        self.peak_rss_mb = 0.0
+
+    def as_dict(self):
+        return {
+            "stage": self.name,
+            "seconds": round(self.seconds, 6),
+            "rows": self.rows,
+            "rows_per_sec": round(self.rows / self.seconds, 1) if self.rows and self.seconds else None,
+            "peak_rss_mb": None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+        }
+
+
+class StageRecorder:
+    def __init__(self, job, metrics_path=None, profile=None, profile_dir=PROFILE_DIR):
+        if profile and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profile!r}; expected one of {PROFILERS}")
+        self.job = job
+        self.metrics_path = metrics_path or os.path.join(METRICS_DIR, f"{job}.prom")
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.stages = []
+        self._started = time.perf_counter()
+        self._profiler = None
+        if profile == "cprofile":
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profile == "tracemalloc":
+            import tracemalloc
+
+            tracemalloc.start(25)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time one stage; set ``.rows`` on the yielded stage if the count is only known afterwards."""
+        stage = Stage(name, rows)
+        reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.seconds = time.perf_counter() - start
+            stage.peak_rss_mb = peak_rss_mb()
+            self.stages.append(stage)
+
+    def summary(self, status="ok", **fields):
+        return {
+            "event": "job_stages",
+            "job": self.job,
+            "status": status,
+            **fields,
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "total_seconds": round(time.perf_counter() - self._started, 6),
+            "stages": [stage.as_dict() for stage in self.stages],
+        }
+
+    # ---------- OUTPUT ----------
+    def prometheus_text(self, summary):
+        job = self.job
+        lines = [
+            "# HELP pricing_job_stage_seconds Wall time of one job stage.",
+            "# TYPE pricing_job_stage_seconds gauge",
+        ]
+        lines += [f'pricing_job_stage_seconds{{job="{job}",stage="{s["stage"]}"}} {s["seconds"]}' for s in summary["stages"]]
+        lines += [
+            "# HELP pricing_job_stage_rows Rows processed by one job stage.",
+            "# TYPE pricing_job_stage_rows gauge",
+        ]
+        lines += [f'pricing_job_stage_rows{{job="{job}",stage="{s["stage"]}"}} {s["rows"]}'
+                  for s in summary["stages"] if s["rows"] is not None]
+        lines += [
+            "# HELP pricing_job_stage_peak_rss_bytes Peak resident memory while a job stage ran.",
+            "# TYPE pricing_job_stage_peak_rss_bytes gauge",
+        ]
+        lines += [f'pricing_job_stage_peak_rss_bytes{{job="{job}",stage="{s["stage"]}"}} {int(s["peak_rss_mb"] * 2**20)}'
+                  for s in summary["stages"] if s["peak_rss_mb"] is not None]
+        lines += [
+            "# HELP pricing_job_duration_seconds Wall time of the whole job.",
+            "# TYPE pricing_job_duration_seconds gauge",
+            f'pricing_job_duration_seconds{{job="{job}",status="{summary["status"]}"}} {summary["total_seconds"]}',
+            "# HELP pricing_job_last_run_timestamp_seconds Unix time the job last finished.",
+            "# TYPE pricing_job_last_run_timestamp_seconds gauge",
+            f'pricing_job_last_run_timestamp_seconds{{job="{job}",status="{summary["status"]}"}} {int(time.time())}',
+        ]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, summary):
+        # Written to a temporary file and renamed so the collector never reads a partial file.
+        os.makedirs(os.path.dirname(os.path.abspath(self.metrics_path)), exist_ok=True)
+        tmp_path = self.metrics_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text(summary))
+        os.replace(tmp_path, self.metrics_path)
+
+    def _dump_profile(self):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        if self.profile == "cprofile":
+            self._profiler.disable()
+            path = os.path.join(self.profile_dir, f"{self.job}_{stamp}.prof")
+            self._profiler.dump_stats(path)
+            return path
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        path = os.path.join(self.profile_dir, f"{self.job}_{stamp}_tracemalloc.txt")
+        with open(path, "w") as f:
+            f.write(f"traced Python memory: {current / 2**20:.1f} MB live at exit, {peak / 2**20:.1f} MB peak\n")
+            f.write(f"top {TRACEMALLOC_TOP} allocation sites still live at exit:\n")
+            for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]:
+                f.write(f"{stat}\n")
+        snapshot.dump(path.replace(".txt", ".snapshot"))
+        return path
+
+    def finish(self, status="ok", **fields):
+        """Print the JSON log line (with any extra ``fields``), write the metrics file and any profile."""
+        if self.profile:
+            profile_path = self._dump_profile()
+        summary = self.summary(status, **fields)
+        if self.profile:
+            summary["profile"] = profile_path
+        print(json.dumps(summary))
+        self.write_prometheus(summary)
+        return summary
@@ -0,0 +1,142 @@
+"""Streaming bulk loader for ``daily_features`` and ``predicted_prices``.
+
+Rows are written in fixed-size chunks with ``COPY ... FROM STDIN`` into a
+temporary staging table and merged into the target with one
+``INSERT ... ON CONFLICT`` statement, so memory stays bounded by the chunk
+size instead of growing with one giant ``VALUES`` string.
+
+Self-check against a local PostgreSQL (uses ``pricing.config.DB_CONFIG``):
+    python -m pricing.loader --rows 1000000
+"""
+import io
+import time
+
+import pandas as pd
+
+CHUNK_ROWS = 50_000
+KEY_COLS = ["date", "product_id"]
+
+
+def _iter_chunks(frames, chunk_rows):
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+
+
+def copy_upsert(conn, table, frames, columns, key_cols=KEY_COLS, chunk_rows=CHUNK_ROWS):
+    """Upsert ``frames`` (a DataFrame or an iterable of them) into ``table``.
+
+    Only ``columns`` are written; rows that collide on ``key_cols`` replace
+    the existing values when they differ. The caller owns the transaction.
+    Returns a dict with ``rows`` (staged), ``written`` (inserted or changed),
+    ``chunks``, ``seconds`` and ``rows_per_sec``.
+    """
+    start = time.perf_counter()
+    stage = f"_stage_{table}"
+    column_list = ", ".join(columns)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+    cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+
+    rows = chunks = 0
+    copy_sql = f"COPY {stage} ({column_list}) FROM STDIN WITH (FORMAT csv)"
+    for chunk in _iter_chunks(frames, chunk_rows):
+        buf = io.StringIO()
+        chunk[columns].to_csv(buf, header=False, index=False)
+        buf.seek(0)
+        cursor.copy_expert(copy_sql, buf)
+        rows += len(chunk)
+        chunks += 1
+
+    update_cols = [col for col in columns if col not in key_cols]
+    if update_cols:
+        # Rows whose values did not change are left alone instead of rewritten.
+        conflict = (
+            "DO UPDATE SET " + ", ".join(f"{col}=EXCLUDED.{col}" for col in update_cols)
+            + f" WHERE ({', '.join('t.' + col for col in update_cols)})"
+            + f" IS DISTINCT FROM ({', '.join('EXCLUDED.' + col for col in update_cols)})"
+        )
+    else:
+        conflict = "DO NOTHING"
+    # DISTINCT ON keeps the last staged row per key so a batch never conflicts with itself.
+    cursor.execute(f"""
+        INSERT INTO {table} AS t ({column_list})
+        SELECT DISTINCT ON ({', '.join(key_cols)}) {column_list} FROM {stage}
+        ORDER BY {', '.join(key_cols)}, ctid DESC
+        ON CONFLICT ({', '.join(key_cols)}) {conflict}
+    """)
+    written = cursor.rowcount
+    cursor.execute(f"DROP TABLE {stage}")
+    cursor.close()
+
+    seconds = time.perf_counter() - start
+    return {
+        "table": table,
+        "rows": rows,
+        "written": written,
+        "chunks": chunks,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else 0.0,
+    }
+
+
+def format_stats(stats):
+    return (f"{stats['table']}: {stats['rows']:,} rows ({stats['written']:,} new or changed) "
+            f"in {stats['chunks']} chunks, "
+            f"{stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+
+
+def main():
+    import argparse
+
+    import numpy as np
+    import psycopg2
+
+    from pricing.config import DB_CONFIG
+
+    parser = argparse.ArgumentParser(description="COPY loader self-check against a local PostgreSQL")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    n_products = max(1, args.rows // 365)
+    idx = np.arange(args.rows)
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(idx // n_products, unit="D"),
+        "product_id": np.char.add("M", (idx % n_products).astype(str)),
+        "predicted_price": np.random.default_rng(0).uniform(10000, 50000, args.rows),
+    })
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE loader_check (
+            date DATE,
+            product_id VARCHAR(10),
+            predicted_price FLOAT,
+            PRIMARY KEY (date, product_id)
+        )
+    """)
+    columns = ["date", "product_id", "predicted_price"]
+    first = copy_upsert(conn, "loader_check", df, columns, chunk_rows=args.chunk_rows)
+    print(format_stats(first))
+    df["predicted_price"] += 1
+    second = copy_upsert(conn, "loader_check", df, columns, chunk_rows=args.chunk_rows)
+    print(format_stats(second) + " (all conflicts)")
+    third = copy_upsert(conn, "loader_check", df, columns, chunk_rows=args.chunk_rows)
+    print(format_stats(third) + " (unchanged)")
+    assert third["written"] == 0, third
+
+    cursor.execute("SELECT count(*), sum(predicted_price) FROM loader_check")
+    count, total = cursor.fetchone()
+    assert count == len(df), (count, len(df))
+    assert abs(total - df["predicted_price"].sum()) < 1e-6 * abs(total), (total, df["predicted_price"].sum())
+    print("✅ Row count and values match after insert + conflict update.")
+    conn.rollback()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
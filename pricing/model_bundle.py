@@ -0,0 +1,157 @@
+"""Versioned model bundle: booster + feature order + frozen categorical vocabulary.
+
+A bundle directory holds ``model.ubj`` (the booster) and ``bundle.json``
+with the ordered feature list and, for every column in ``CAT_COLS``, the
+sorted training values whose position is the code the model was trained
+on. Scoring maps raw values to codes with precomputed lookups and writes
+straight into one float32 matrix in model column order, so codes no longer
+depend on which products a scoring run happens to see.
+
+Usage:
+    python -m pricing.model_bundle --model notebooks/xgb_price_model.json --out model/price_model_v1
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from pricing.features import CAT_COLS, TRAINED_FEATURES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUNDLE = os.path.join(ROOT, "model", "price_model_v1")
+BUNDLE_FORMAT = 1
+ARTIFACT_FILES = ("model.ubj", "bundle.json")
+
+
+def read_manifest(path=DEFAULT_BUNDLE):
+    """``bundle.json`` of a bundle directory, without loading the booster."""
+    with open(os.path.join(path, "bundle.json")) as f:
+        return json.load(f)
+
+
+def content_hash(path):
+    """SHA-256 over the bundle's artifact files, in a fixed order."""
+    digest = hashlib.sha256()
+    for name in ARTIFACT_FILES:
+        with open(os.path.join(path, name), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelBundle:
+    def __init__(self, booster, features, vocab, version=1, metadata=None, path=None, sha256=None):
+        self.booster = booster
+        self.features = list(features)
+        self.version = version
+        self.metadata = metadata or {}
+        # Directory and content hash of the saved artifacts; None until saved or loaded.
+        self.path = path
+        self.sha256 = sha256
+        self.vocab = {col: pd.Index(values, dtype=object) for col, values in vocab.items()}
+        self.code_maps = {col: {value: code for code, value in enumerate(index)} for col, index in self.vocab.items()}
+        self._columns = [(j, col, col in self.vocab) for j, col in enumerate(self.features)]
+
+    # ---------- CONSTRUCTION ----------
+    @classmethod
+    def from_training_frame(cls, booster, df, version=1, **metadata):
+        """Freeze the vocabulary the training frame's ``astype("category")`` codes came from."""
+        vocab = {col: sorted(pd.unique(df[col].astype(str))) for col in CAT_COLS}
+        return cls(booster, booster.feature_names or TRAINED_FEATURES, vocab, version, metadata)
+
+    # ---------- PERSISTENCE ----------
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.booster.save_model(os.path.join(path, "model.ubj"))
+        manifest = {
+            "format": BUNDLE_FORMAT,
+            "version": self.version,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "features": self.features,
+            "vocab": {col: list(index) for col, index in self.vocab.items()},
+            "metadata": self.metadata,
+        }
+        with open(os.path.join(path, "bundle.json"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        self.path, self.sha256 = path, content_hash(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_BUNDLE):
+        manifest = read_manifest(path)
+        booster = xgb.Booster()
+        booster.load_model(os.path.join(path, "model.ubj"))
+        return cls(booster, manifest["features"], manifest["vocab"], manifest["version"], manifest.get("metadata"),
+                   path=path, sha256=content_hash(path))
+
+    # ---------- SCORING ----------
+    def codes(self, col, values):
+        """Training codes for raw ``values`` of ``col``; unseen values become NaN (missing)."""
+        index = self.vocab[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Look up each category once, then gather by the column's own codes.
+            table = index.get_indexer(values.cat.categories.astype(str)).astype(np.float32)
+            table = np.append(table, np.nan)  # code -1 (missing) maps to the last slot
+            codes = table[values.cat.codes.to_numpy()]
+        else:
+            codes = index.get_indexer(np.asarray(values, dtype=str)).astype(np.float32)
+        codes[codes < 0] = np.nan
+        return codes
+
+    def matrix(self, df, out=None):
+        """Fill a preallocated ``(len(df), n_features)`` float32 matrix in model column order."""
+        if out is None:
+            out = np.empty((len(df), len(self.features)), dtype=np.float32)
+        for j, col, categorical in self._columns:
+            if categorical:
+                out[:, j] = self.codes(col, df[col])
+            else:
+                out[:, j] = df[col].to_numpy(dtype=np.float32, na_value=np.nan)
+        return out
+
+    def row_vector(self, row):
+        """Single JSON-style row (raw categoricals allowed) to a float32 vector."""
+        vector = np.full(len(self.features), np.nan, dtype=np.float32)
+        for j, col, categorical in self._columns:
+            value = row.get(col)
+            if value is None:
+                continue
+            if categorical:
+                if isinstance(value, str):
+                    value = self.code_maps[col].get(value, np.nan)
+            vector[j] = value
+        return vector
+
+    def predict(self, df):
+        return self.booster.inplace_predict(self.matrix(df))
+
+
+def main():
+    import argparse
+
+    from pricing.datasets import load_dataset
+
+    parser = argparse.ArgumentParser(description="Package a trained booster with its feature schema and vocabulary")
+    parser.add_argument("--model", default=os.path.join(ROOT, "notebooks", "xgb_price_model.json"))
+    parser.add_argument("--data", default="preprocessed", help="dataset the model was trained on")
+    parser.add_argument("--out", default=DEFAULT_BUNDLE)
+    parser.add_argument("--version", type=int, default=1)
+    parser.add_argument("--train-cutoff", default="2024-10-01",
+                        help="first date the model was not trained on (the notebook's train/test split)")
+    args = parser.parse_args()
+
+    booster = xgb.Booster()
+    booster.load_model(args.model)
+    df = load_dataset(args.data, columns=CAT_COLS)
+    bundle = ModelBundle.from_training_frame(booster, df, version=args.version, source_model=os.path.basename(args.model),
+                                             train_cutoff=args.train_cutoff)
+    bundle.save(args.out)
+    sizes = ", ".join(f"{col}={len(index)}" for col, index in bundle.vocab.items())
+    print(f"✅ Bundle v{bundle.version} written to {args.out} ({len(bundle.features)} features; vocab {sizes})")
+
+
+if __name__ == "__main__":
+    main()
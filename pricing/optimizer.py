@@ -0,0 +1,161 @@
+"""Revenue-maximizing price optimizer over a grid of candidate prices.
+
+For every product the candidate prices span the competitor range widened
+by ``BAND`` on each side. All ``products x candidates`` scenarios are built
+as one float32 matrix (the product's latest feature row repeated, with the
+price-dependent inputs ``revenue`` and ``discount`` set per candidate) and
+scored with a single ``inplace_predict`` call. The model's output is the
+fair market price under that scenario. Expected demand falls exponentially
+as the candidate rises above it::
+
+    units = units_ref * exp(-ELASTICITY * (price / fair_price - 1))
+
+Units are capped by stock and the candidate with the highest expected
+revenue wins. Everything is array arithmetic on ``(products, candidates)``
+grids; there are no Python loops over products or candidates.
+
+Usage:
+    python -m pricing.optimizer --out data/optimal_prices.csv   # latest day in daily_features
+    python -m pricing.optimizer --synthetic 10000 --candidates 50
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from pricing.features import COMPETITOR_COLS
+from pricing.model_bundle import DEFAULT_BUNDLE, ModelBundle
+
+N_CANDIDATES = 50
+BAND = 0.10          # search from min competitor * 0.90 to max competitor * 1.10
+ELASTICITY = 1.0     # relative demand drop per 100% above the fair price
+MAX_DISCOUNT = 30    # discount (%) range seen in training
+
+LATEST_FEATURES_SQL = """
+    SELECT DISTINCT ON (product_id) *
+    FROM daily_features
+    ORDER BY product_id, date DESC
+"""
+
+RESULT_COLUMNS = [
+    "product_id", "min_price", "max_price", "optimal_price", "fair_price",
+    "expected_units", "expected_revenue", "stock", "stock_limited",
+]
+
+
+def candidate_grid(latest, n_candidates=N_CANDIDATES, band=BAND):
+    """``(products, candidates)`` prices spanning the widened competitor range."""
+    competitors = latest[COMPETITOR_COLS].to_numpy(dtype=float)
+    lower = competitors.min(axis=1) * (1 - band)
+    upper = competitors.max(axis=1) * (1 + band)
+    steps = np.linspace(0.0, 1.0, n_candidates)
+    return lower[:, None] + (upper - lower)[:, None] * steps[None, :]
+
+
+def score_candidates(bundle, latest, prices):
+    """Fair price for every candidate, from one batched model call."""
+    n_products, n_candidates = prices.shape
+    base = bundle.matrix(latest)
+    scenarios = np.repeat(base, n_candidates, axis=0)
+
+    units = latest["units_sold"].to_numpy(dtype=float)
+    list_price = latest[COMPETITOR_COLS].to_numpy(dtype=float).max(axis=1)
+    columns = {col: j for j, col in enumerate(bundle.features)}
+    if "revenue" in columns:
+        scenarios[:, columns["revenue"]] = (prices * units[:, None]).ravel()
+    if "discount" in columns:
+        discount = np.clip(np.round((1 - prices / list_price[:, None]) * 100), 0, MAX_DISCOUNT)
+        scenarios[:, columns["discount"]] = discount.ravel()
+
+    return bundle.booster.inplace_predict(scenarios).reshape(n_products, n_candidates)
+
+
+def optimize_prices(bundle, latest, n_candidates=N_CANDIDATES, band=BAND, elasticity=ELASTICITY):
+    """Best candidate price per product of ``latest`` (one feature row per product)."""
+    latest = latest.reset_index(drop=True)
+    prices = candidate_grid(latest, n_candidates, band)
+    fair = score_candidates(bundle, latest, prices)
+
+    units_ref = latest["units_sold"].to_numpy(dtype=float)[:, None]
+    stock = latest["stock"].to_numpy(dtype=float)[:, None]
+    demand = units_ref * np.exp(-elasticity * (prices / fair - 1))
+    units = np.minimum(demand, stock)
+    revenue = prices * units
+
+    best = revenue.argmax(axis=1)
+    rows = np.arange(len(latest))
+    return pd.DataFrame({
+        "product_id": latest["product_id"].astype(str).to_numpy(),
+        "min_price": prices[:, 0],
+        "max_price": prices[:, -1],
+        "optimal_price": prices[rows, best],
+        "fair_price": fair[rows, best],
+        "expected_units": units[rows, best],
+        "expected_revenue": revenue[rows, best],
+        "stock": stock[:, 0],
+        "stock_limited": demand[rows, best] > stock[:, 0],
+    }, columns=RESULT_COLUMNS)
+
+
+def load_latest_features(conn):
+    """Most recent ``daily_features`` row of every product."""
+    with conn.cursor() as cursor:
+        cursor.execute(LATEST_FEATURES_SQL)
+        columns = [desc[0] for desc in cursor.description]
+        latest = pd.DataFrame(cursor.fetchall(), columns=columns)
+    numeric = [col for col in columns if col not in ("date", "product_id", "brand", "storage_variant", "category")]
+    latest[numeric] = latest[numeric].apply(pd.to_numeric, errors="coerce")
+    return latest
+
+
+def synthetic_latest(n_products):
+    """Latest-day feature rows for ``n_products`` synthetic products."""
+    from benchmarks.bench_features import DAYS, make_frame
+    from pricing.features import add_date_features, add_lag_features
+
+    df = add_lag_features(add_date_features(make_frame(n_products * DAYS)), fill_value=0)
+    return df[df["date"] == df["date"].max()].reset_index(drop=True)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Revenue-maximizing price optimizer")
+    parser.add_argument("--bundle", default=DEFAULT_BUNDLE)
+    parser.add_argument("--candidates", type=int, default=N_CANDIDATES)
+    parser.add_argument("--band", type=float, default=BAND)
+    parser.add_argument("--elasticity", type=float, default=ELASTICITY)
+    parser.add_argument("--synthetic", type=int, metavar="N_PRODUCTS",
+                        help="optimize N synthetic products instead of reading daily_features")
+    parser.add_argument("--out", help="write the optimal prices to this CSV file")
+    args = parser.parse_args()
+
+    bundle = ModelBundle.load(args.bundle)
+    if args.synthetic:
+        latest = synthetic_latest(args.synthetic)
+    else:
+        import psycopg2
+
+        from pricing.config import DB_CONFIG
+
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            latest = load_latest_features(conn)
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    result = optimize_prices(bundle, latest, args.candidates, args.band, args.elasticity)
+    seconds = time.perf_counter() - start
+
+    n_scored = len(result) * args.candidates
+    print(result.head(10).to_string(index=False))
+    print(f"✅ {len(result):,} products x {args.candidates} candidates ({n_scored:,} scenarios) "
+          f"optimized in {seconds:.2f}s; {int(result['stock_limited'].sum()):,} stock-limited")
+    if args.out:
+        result.to_csv(args.out, index=False)
+        print(f"Written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Multi-process batch scoring sharded by ``product_id``.
+
+Rows are split into shards by a stable hash of ``product_id`` and scored in
+a process pool. Each worker loads the model bundle once and runs XGBoost
+with ``nthread`` bounded to its share of the cores, so workers do not
+oversubscribe the machine. Shard results are yielded as they complete, so
+they can be streamed straight into the loader. Tree predictions are
+per-row, so the output is identical to the single-process path.
+
+Usage (benchmark / equivalence check on synthetic rows):
+    python -m pricing.parallel_scoring --rows 1000000 --workers 4
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from pricing.model_bundle import DEFAULT_BUNDLE, ModelBundle, read_manifest
+
+KEY_COLS = ["date", "product_id"]
+
+_bundle = None
+
+
+def _init_worker(bundle_path, nthread):
+    global _bundle
+    _bundle = ModelBundle.load(bundle_path)
+    _bundle.booster.set_param({"nthread": nthread})
+
+
+def _score_shard(shard_id, shard):
+    start = time.perf_counter()
+    preds = _bundle.predict(shard)
+    result = shard[KEY_COLS].copy()
+    # float64, as on the single-process path: COPY writes float32 as its shortest repr, which
+    # reads back as a different double.
+    result["predicted_price"] = preds.astype(np.float64)
+    return shard_id, result, time.perf_counter() - start
+
+
+def shard_ids(product_ids, n_shards):
+    """Stable shard number per row; every row of a product lands in the same shard."""
+    hashes = pd.util.hash_array(np.asarray(product_ids, dtype=object))
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def threads_per_worker(workers):
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def score_sharded(df, workers, bundle_path=DEFAULT_BUNDLE, n_shards=None, nthread=None, timings=None):
+    """Yield ``[date, product_id, predicted_price]`` frames, one per completed shard.
+
+    ``n_shards`` defaults to ``4 * workers`` so a slow shard does not leave
+    other workers idle. If ``timings`` is a list, one dict per shard
+    (``shard``, ``rows``, ``seconds``, ``rows_per_sec``) is appended to it.
+    """
+    n_shards = n_shards or 4 * workers
+    nthread = nthread or threads_per_worker(workers)
+    columns = list(dict.fromkeys(KEY_COLS + read_manifest(bundle_path)["features"]))
+    shards = shard_ids(df["product_id"], n_shards)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(bundle_path, nthread)) as pool:
+        futures = [
+            pool.submit(_score_shard, shard_id, df.loc[shards == shard_id, columns])
+            for shard_id in range(n_shards)
+            if (shards == shard_id).any()
+        ]
+        for future in as_completed(futures):
+            shard_id, result, seconds = future.result()
+            if timings is not None:
+                timings.append({
+                    "shard": shard_id,
+                    "rows": len(result),
+                    "seconds": seconds,
+                    "rows_per_sec": len(result) / seconds if seconds else 0.0,
+                })
+            yield result
+
+
+def predict_sharded(df, workers, bundle_path=DEFAULT_BUNDLE, **kwargs):
+    """Predictions aligned to ``df.index`` (collects every shard)."""
+    results = pd.concat(list(score_sharded(df, workers, bundle_path, **kwargs)))
+    return results["predicted_price"].reindex(df.index).to_numpy()
+
+
+def format_timings(timings):
+    lines = [f"  shard {t['shard']:>3}: {t['rows']:>10,} rows in {t['seconds']:.3f}s ({t['rows_per_sec']:,.0f} rows/sec)"
+             for t in sorted(timings, key=lambda t: t["shard"])]
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+
+    from benchmarks.bench_features import make_frame
+    from pricing.features import add_date_features, add_lag_features
+
+    parser = argparse.ArgumentParser(description="Sharded scoring benchmark and equivalence check")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bundle", default=DEFAULT_BUNDLE)
+    args = parser.parse_args()
+
+    df = add_lag_features(add_date_features(make_frame(args.rows)), fill_value=0)
+    bundle = ModelBundle.load(args.bundle)
+
+    start = time.perf_counter()
+    single = bundle.predict(df)
+    single_sec = time.perf_counter() - start
+
+    timings = []
+    start = time.perf_counter()
+    sharded = predict_sharded(df, args.workers, args.bundle, timings=timings)
+    sharded_sec = time.perf_counter() - start
+
+    print(format_timings(timings))
+    print(f"single process: {len(df):,} rows in {single_sec:.2f}s")
+    print(f"{args.workers} workers x {threads_per_worker(args.workers)} threads: {sharded_sec:.2f}s")
+    assert np.array_equal(single, sharded), "sharded predictions differ from single-process predictions"
+    print("✅ Sharded output identical to single-process output.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Streaming join of the three raw CSVs into the preprocessed dataset.
+
+Does what ``notebooks/preprocessing.ipynb`` does (inner joins of sales,
+behavior and competitor prices on ``(date, product_id)``, date features,
+``fillna(0)``) without loading the sources whole. Each source is read in
+chunks and must be sorted by date; the readers advance together as a
+sort-merge on date. Every date below the smallest "last date seen" of the
+three is complete in all buffers, so those rows are joined (the notebook's
+merges, on a block of dates) and appended to the output, and only the
+source that is furthest behind is read next. Memory stays around one chunk
+per source whatever the length of the history. Rows without a partner in
+the other two sources are counted per source and reported.
+
+Usage:
+    python -m pricing.preprocess                                   # data/raw -> data/preprocessing
+    python -m pricing.preprocess --sales data/synthetic/mobile_sales.csv \\
+        --behavior data/synthetic/customer_behavior.csv \\
+        --competitors data/synthetic/competitor_prices.csv --out data/synthetic/preprocessed.csv
+"""
+import os
+import time
+
+import pandas as pd
+
+from pricing.datasets import source_path
+from pricing.features import add_date_features
+
+KEY_COLS = ["date", "product_id"]
+SOURCES = ("sales", "behavior", "competitors")
+CHUNK_ROWS = 100_000
+
+
+class _Source:
+    """Date-ordered chunks of one CSV plus the rows read but not joined yet."""
+
+    def __init__(self, name, path, chunk_rows):
+        self.name = name
+        self.path = path
+        self.chunks = pd.read_csv(path, chunksize=chunk_rows)
+        self.buffer = None
+        self.done = False
+        self.rows = 0
+        self.dropped = 0
+
+    def read(self):
+        chunk = next(self.chunks, None)
+        if chunk is None or chunk.empty:
+            self.done = True
+            return
+        chunk["date"] = pd.to_datetime(chunk["date"], format="ISO8601")
+        previous = self.buffer["date"].iloc[-1:] if self.buffer is not None else chunk["date"].iloc[:0]
+        if not pd.concat([previous, chunk["date"]]).is_monotonic_increasing:
+            raise ValueError(f"{self.path} is not sorted by date (near row {self.rows + 1:,}); sort it first")
+        self.rows += len(chunk)
+        self.buffer = chunk if self.buffer is None else pd.concat([self.buffer, chunk], ignore_index=True)
+
+    def complete_before(self):
+        """Every row dated before this has been read (``None``: everything has)."""
+        return None if self.done else self.buffer["date"].iloc[-1]
+
+    def take(self, horizon):
+        """Remove and return the buffered rows dated before ``horizon`` (all of them for ``None``)."""
+        n = len(self.buffer) if horizon is None else int(self.buffer["date"].searchsorted(horizon))
+        block, self.buffer = self.buffer.iloc[:n], self.buffer.iloc[n:]
+        return block
+
+
+def join_block(sales, behavior, competitors):
+    """The notebook's preprocessing for one block of dates."""
+    df = pd.merge(sales, behavior, on=KEY_COLS, how="inner")
+    df = pd.merge(df, competitors, on=KEY_COLS, how="inner")
+    df = add_date_features(df)
+    df = df.fillna(0)
+    return df.drop(columns=["product_name_x", "product_name_y"], errors="ignore")
+
+
+def preprocess(paths, out, chunk_rows=CHUNK_ROWS):
+    """Stream ``paths`` (``{"sales": ..., "behavior": ..., "competitors": ...}``) into the CSV ``out``."""
+    start = time.perf_counter()
+    sources = [_Source(name, paths[name], chunk_rows) for name in SOURCES]
+    for source in sources:
+        source.read()
+        if source.buffer is None:
+            source.buffer = pd.read_csv(source.path, nrows=0).assign(date=pd.Series(dtype="datetime64[ns]"))
+
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    tmp_path = out + ".tmp"
+    rows = blocks = 0
+    try:
+        with open(tmp_path, "w", newline="") as f:
+            while True:
+                bounds = [source.complete_before() for source in sources]
+                pending = [bound for bound in bounds if bound is not None]
+                horizon = min(pending) if pending else None
+                parts = [source.take(horizon) for source in sources]
+                df = join_block(*parts)
+                keys = pd.MultiIndex.from_frame(df[KEY_COLS])
+                for source, part in zip(sources, parts):
+                    source.dropped += int((~pd.MultiIndex.from_frame(part[KEY_COLS]).isin(keys)).sum())
+                df.to_csv(f, header=blocks == 0, index=False, date_format="%Y-%m-%d")
+                rows += len(df)
+                blocks += 1
+                if horizon is None:
+                    break
+                # Only the sources holding back the horizon need more rows.
+                for source, bound in zip(sources, bounds):
+                    if bound == horizon:
+                        source.read()
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, out)
+
+    seconds = time.perf_counter() - start
+    return {
+        "out": out,
+        "rows": rows,
+        "blocks": blocks,
+        "read": {source.name: source.rows for source in sources},
+        "dropped": {source.name: source.dropped for source in sources},
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else 0.0,
+    }
+
+
+def format_stats(stats):
+    read = ", ".join(f"{name} {n:,}" for name, n in stats["read"].items())
+    dropped = ", ".join(f"{name} {n:,}" for name, n in stats["dropped"].items())
+    return (f"✅ {stats['rows']:,} rows written to {stats['out']} in {stats['blocks']:,} blocks, "
+            f"{stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)\n"
+            f"   read: {read}\n"
+            f"   dropped by the join (no match in the other sources): {dropped}")
+
+
+def main():
+    import argparse
+
+    from pricing.instrumentation import format_rss, peak_rss_mb
+
+    parser = argparse.ArgumentParser(description="Join the raw sales, behavior and competitor CSVs in constant memory")
+    parser.add_argument("--sales", default=source_path("sales"))
+    parser.add_argument("--behavior", default=source_path("behavior"))
+    parser.add_argument("--competitors", default=source_path("competitors"))
+    parser.add_argument("--out", default=source_path("preprocessed"))
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS, help="rows read from a source at a time")
+    args = parser.parse_args()
+
+    stats = preprocess({name: getattr(args, name) for name in SOURCES}, args.out, args.chunk_rows)
+    print(format_stats(stats))
+    print(f"   peak RSS: {format_rss(peak_rss_mb())}")
+
+
+if __name__ == "__main__":
+    main()
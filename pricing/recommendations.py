@@ -0,0 +1,77 @@
+"""Per-product price recommendations materialized by the daily job.
+
+The inputs (means of predicted price, competitor prices, units sold and
+stock over the stored history) are read from the monthly rollups, classified
+with vectorized rules and written to ``price_recommendations`` so the
+dashboard only reads a small, indexed table.
+"""
+import numpy as np
+import pandas as pd
+
+from pricing.loader import copy_upsert
+
+# ---------- RULES ----------
+INCREASE_ABOVE = 1.05      # predicted > avg competitor * 1.05 ...
+INCREASE_MIN_UNITS = 10    # ... and selling more than 10 units/day on average
+DECREASE_BELOW = 0.95      # predicted < avg competitor * 0.95
+HIGH_STOCK = 100
+LOW_SALES = 5
+
+RECOMMENDATION_COLUMNS = [
+    "product_id", "predicted_price", "flipkart_price", "amazon_price", "myntra_price",
+    "avg_competitor_price", "units_sold", "stock", "recommendation",
+    "high_stock", "low_sales", "load_id",
+]
+
+# Means over the whole history, rebuilt from the monthly rollups (pricing/rollups.py), so
+# the job reads a few rows per product instead of joining every stored day.
+INPUTS_SQL = """
+    SELECT product_id,
+           sum(predicted_price) / NULLIF(sum(predicted_days), 0) AS predicted_price,
+           sum(flipkart_price)::float / sum(days) AS flipkart_price,
+           sum(amazon_price)::float / sum(days) AS amazon_price,
+           sum(myntra_price)::float / sum(days) AS myntra_price,
+           sum(units_sold)::float / sum(days) AS units_sold,
+           sum(stock)::float / sum(days) AS stock
+    FROM product_rollups
+    WHERE grain = 'month'
+    GROUP BY product_id
+"""
+
+
+def classify(rec_df):
+    """Add ``avg_competitor_price``, ``recommendation`` and the stock/sales alert flags."""
+    rec_df["avg_competitor_price"] = rec_df[["flipkart_price", "amazon_price", "myntra_price"]].mean(axis=1)
+    predicted = rec_df["predicted_price"].to_numpy(dtype=float)
+    competitor = rec_df["avg_competitor_price"].to_numpy(dtype=float)
+    units = rec_df["units_sold"].to_numpy(dtype=float)
+    rec_df["recommendation"] = np.select(
+        [
+            (predicted > competitor * INCREASE_ABOVE) & (units > INCREASE_MIN_UNITS),
+            predicted < competitor * DECREASE_BELOW,
+        ],
+        ["Increase Price", "Decrease Price"],
+        default="Maintain Price",
+    )
+    rec_df["high_stock"] = rec_df["stock"] > HIGH_STOCK
+    rec_df["low_sales"] = rec_df["units_sold"] < LOW_SALES
+    return rec_df
+
+
+def refresh_recommendations(conn, load_id=None):
+    """Recompute every product's recommendation and upsert it; caller commits."""
+    with conn.cursor() as cursor:
+        cursor.execute(INPUTS_SQL)
+        columns = [desc[0] for desc in cursor.description]
+        rec_df = pd.DataFrame(cursor.fetchall(), columns=columns)
+    for col in columns[1:]:
+        rec_df[col] = pd.to_numeric(rec_df[col], errors="coerce")
+    rec_df = classify(rec_df)
+    rec_df["load_id"] = load_id
+    stats = copy_upsert(conn, "price_recommendations", rec_df, RECOMMENDATION_COLUMNS, key_cols=["product_id"])
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "DELETE FROM price_recommendations WHERE NOT (product_id = ANY(%s))",
+            (rec_df["product_id"].astype(str).tolist(),),
+        )
+    return stats
@@ -0,0 +1,183 @@
+"""Model registry: versioned bundles, content hashes and a warm in-process cache.
+
+Bundles live in ``model/price_model_v<N>/`` (booster in binary UBJ plus
+``bundle.json``, see ``pricing/model_bundle.py``). ``model/registry.json``
+indexes them with a SHA-256 of the artifact files, their size and metadata,
+and names the ``current`` version. ``get_model()`` resolves the current
+version (or ``PRICING_MODEL_VERSION``), checks the hash and deserializes the
+bundle once per process; later calls return the same object. The index is
+re-read on every call, so a long-running process picks up a promotion on its
+next lookup.
+
+Usage:
+    python -m pricing.registry list
+    python -m pricing.registry add model/price_model_v2 --promote
+    python -m pricing.registry promote 1
+    python -m pricing.registry verify
+"""
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from pricing.model_bundle import ARTIFACT_FILES, ROOT, ModelBundle, content_hash, read_manifest
+
+REGISTRY_DIR = os.path.join(ROOT, "model")
+INDEX_FILE = "registry.json"
+
+_models = {}
+_lock = threading.Lock()
+
+
+# ---------- INDEX ----------
+def read_index(registry_dir=REGISTRY_DIR):
+    path = os.path.join(registry_dir, INDEX_FILE)
+    if not os.path.exists(path):
+        return {"current": None, "models": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_index(index, registry_dir):
+    path = os.path.join(registry_dir, INDEX_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(index, f, indent=2)
+        f.write("\n")
+    os.replace(path + ".tmp", path)
+
+
+def add(bundle_dir, registry_dir=REGISTRY_DIR, promote=False):
+    """Index an existing bundle directory under its manifest version; returns the entry."""
+    manifest = read_manifest(bundle_dir)
+    entry = {
+        "version": manifest["version"],
+        "path": os.path.relpath(os.path.abspath(bundle_dir), registry_dir),
+        "sha256": content_hash(bundle_dir),
+        "size_bytes": sum(os.path.getsize(os.path.join(bundle_dir, name)) for name in ARTIFACT_FILES),
+        "created_at": manifest.get("created_at"),
+        "registered_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "features": len(manifest["features"]),
+        "metadata": manifest.get("metadata", {}),
+    }
+    index = read_index(registry_dir)
+    existing = [m for m in index["models"] if m["version"] == entry["version"]]
+    if existing and existing[0]["sha256"] != entry["sha256"]:
+        raise ValueError(f"Version {entry['version']} is already registered with different contents; "
+                         f"bump the bundle version instead of overwriting it")
+    index["models"] = sorted([m for m in index["models"] if m["version"] != entry["version"]] + [entry],
+                             key=lambda m: m["version"])
+    if promote or index["current"] is None:
+        index["current"] = entry["version"]
+    _write_index(index, registry_dir)
+    return entry
+
+
+def register(bundle, registry_dir=REGISTRY_DIR, promote=False):
+    """Save ``bundle`` as ``price_model_v<version>`` in the registry and index it."""
+    bundle_dir = os.path.join(registry_dir, f"price_model_v{bundle.version}")
+    if os.path.exists(os.path.join(bundle_dir, "bundle.json")):
+        raise ValueError(f"{bundle_dir} already exists; bump the bundle version instead of overwriting it")
+    bundle.save(bundle_dir)
+    return add(bundle_dir, registry_dir, promote)
+
+
+def promote(version, registry_dir=REGISTRY_DIR):
+    index = read_index(registry_dir)
+    if not any(m["version"] == version for m in index["models"]):
+        raise KeyError(f"Model version {version} is not registered")
+    index["current"] = version
+    _write_index(index, registry_dir)
+
+
+def resolve(version=None, registry_dir=REGISTRY_DIR):
+    """Index entry of ``version``; defaults to ``PRICING_MODEL_VERSION``, then the current one."""
+    from pricing.config import MODEL_VERSION
+
+    index = read_index(registry_dir)
+    version = version or MODEL_VERSION or index["current"]
+    for entry in index["models"]:
+        if version is not None and entry["version"] == int(version):
+            return {**entry, "dir": os.path.normpath(os.path.join(registry_dir, entry["path"]))}
+    raise KeyError(f"Model version {version} is not registered in {os.path.join(registry_dir, INDEX_FILE)}")
+
+
+def bundle_dir(version=None, registry_dir=REGISTRY_DIR):
+    return resolve(version, registry_dir)["dir"]
+
+
+def model_file(version=None, registry_dir=REGISTRY_DIR):
+    """Path of the version's UBJ booster, for code that loads a bare ``xgboost.Booster``."""
+    return os.path.join(bundle_dir(version, registry_dir), "model.ubj")
+
+
+def verify(entry, actual=None):
+    actual = actual or content_hash(entry["dir"])
+    if actual != entry["sha256"]:
+        raise ValueError(f"Model v{entry['version']} at {entry['dir']} does not match its registered hash "
+                         f"({actual[:12]} != {entry['sha256'][:12]})")
+
+
+# ---------- PROCESS-WIDE CACHE ----------
+def get_model(version=None, registry_dir=REGISTRY_DIR):
+    """The registered bundle, deserialized (and hash-checked) on first use, then shared."""
+    entry = resolve(version, registry_dir)
+    key = entry["sha256"]
+    bundle = _models.get(key)
+    if bundle is None:
+        with _lock:
+            bundle = _models.get(key)
+            if bundle is None:
+                bundle = ModelBundle.load(entry["dir"])
+                verify(entry, bundle.sha256)
+                _models[key] = bundle
+    return bundle
+
+
+def clear_cache():
+    with _lock:
+        _models.clear()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="registered versions")
+    add_cmd = commands.add_parser("add", help="index an existing bundle directory")
+    add_cmd.add_argument("bundle")
+    add_cmd.add_argument("--promote", action="store_true", help="make it the current version")
+    promote_cmd = commands.add_parser("promote", help="make a registered version current")
+    promote_cmd.add_argument("version", type=int)
+    verify_cmd = commands.add_parser("verify", help="check artifact hashes and that the bundle loads")
+    verify_cmd.add_argument("version", type=int, nargs="?")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        entry = add(args.bundle, args.registry, args.promote)
+        print(f"✅ Registered v{entry['version']} ({entry['sha256'][:12]}, {entry['size_bytes']:,} bytes)")
+    elif args.command == "promote":
+        promote(args.version, args.registry)
+        print(f"✅ v{args.version} is now the current model")
+    elif args.command == "verify":
+        import time
+
+        start = time.perf_counter()
+        bundle = get_model(args.version, args.registry)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        get_model(args.version, args.registry)
+        warm = time.perf_counter() - start
+        print(f"✅ v{bundle.version} matches {bundle.sha256[:12]}; "
+              f"cold load {cold * 1000:.1f} ms, cached lookup {warm * 1000:.2f} ms")
+    else:
+        index = read_index(args.registry)
+        for m in index["models"]:
+            marker = "*" if m["version"] == index["current"] else " "
+            print(f"{marker} v{m['version']:<4} {m['sha256'][:12]}  {m['size_bytes']:>10,} bytes  "
+                  f"{m['features']} features  {m['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Event-driven repricing from a stream of competitor price updates.
+
+Producers append one JSON object per line to an append-only file, the local
+stand-in for a queue topic::
+
+    {"date": "2024-03-05", "product_id": "M101", "amazon_price": 15499}
+
+with any subset of ``flipkart_price``, ``amazon_price`` and ``myntra_price``.
+Each batch reads the complete lines after the committed byte offset, keeps
+the last price per (date, product_id, platform) and compares it with
+``daily_features``; only prices that actually moved go further. A price on
+day d is also the ``_lag1`` feature of d+1 and the ``_lag7`` feature of d+7,
+so those rows get the new value written into their lag column directly,
+without re-reading any history. The touched rows are re-scored (their
+inputs changed, so the prediction cache is skipped), and the rows, predictions, rollups, recommendations, a
+``pipeline_loads`` marker and the new offset are committed together, so a
+crash never applies a batch twice. Cost follows the number of changes, not
+the size of the history.
+
+Changes inside the daily feature store's window are patched into the store
+after the commit, so the next daily run lags from the new prices. Do not
+run the consumer while the daily job is running; the job rewrites the store
+when it finishes.
+
+Usage:
+    python -m pricing.repricing                  # apply pending events and exit
+    python -m pricing.repricing --follow         # keep polling for new events
+"""
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from pricing.feature_store import SERIES, WINDOW, FeatureStore
+from pricing.features import COMPETITOR_COLS
+from pricing.schema import FEATURE_COLUMNS
+
+KEY_COLS = ["date", "product_id"]
+# Days after a price change whose rows carry it, and the column it lands in there
+LAG_OFFSETS = {0: "", 1: "_lag1", 7: "_lag7"}
+PRICE_COLUMNS = [col + suffix for col in COMPETITOR_COLS for suffix in LAG_OFFSETS.values()]
+BATCH_LINES = 10_000
+POLL_SECONDS = 1.0
+
+ROWS_SQL = f"""
+    SELECT {", ".join("f." + col for col in FEATURE_COLUMNS)}
+    FROM daily_features f
+    JOIN unnest(%s::date[], %s::text[]) AS k (date, product_id)
+      ON f.date = k.date AND f.product_id = k.product_id
+"""
+
+
+# ---------- STREAM ----------
+def read_offset(cursor, source):
+    cursor.execute("SELECT byte_offset FROM stream_offsets WHERE source = %s", (source,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def save_offset(cursor, source, offset, events):
+    """Advance the committed read position; call inside the transaction that applied the events."""
+    cursor.execute("""
+        INSERT INTO stream_offsets (source, byte_offset, events) VALUES (%s, %s, %s)
+        ON CONFLICT (source) DO UPDATE SET
+            byte_offset = EXCLUDED.byte_offset,
+            events = stream_offsets.events + EXCLUDED.events,
+            updated_at = now()
+    """, (source, offset, events))
+
+
+def parse_events(records):
+    """``(events, rejected)``: valid updates as ``date, product_id`` + prices (NaN where not given)."""
+    events = pd.DataFrame.from_records(records, columns=KEY_COLS + COMPETITOR_COLS)
+    events["date"] = pd.to_datetime(events["date"], errors="coerce", format="ISO8601").dt.normalize()
+    prices = events[COMPETITOR_COLS].apply(pd.to_numeric, errors="coerce").round()
+    events[COMPETITOR_COLS] = prices.where(prices > 0)
+    valid = (events["date"].notna() & events["product_id"].map(lambda v: isinstance(v, str))
+             & events[COMPETITOR_COLS].notna().any(axis=1))
+    return events[valid].reset_index(drop=True), int((~valid).sum())
+
+
+def read_events(path, offset=0, max_lines=BATCH_LINES):
+    """``(events, next_offset, lines, rejected)`` for the complete lines after byte ``offset``."""
+    if not os.path.exists(path):
+        return parse_events([])[0], offset, 0, 0
+    if os.path.getsize(path) < offset:
+        raise ValueError(f"{path} is shorter than its committed offset {offset}; use --reset to start over")
+    records, lines, rejected = [], 0, 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while lines < max_lines:
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break  # end of file, or a line still being written
+            offset += len(line)
+            lines += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict):
+                records.append(record)
+            elif line.strip():
+                rejected += 1
+    events, invalid = parse_events(records)
+    return events, offset, lines, rejected + invalid
+
+
+# ---------- CHANGES ----------
+def fetch_rows(conn, keys):
+    """Stored ``daily_features`` rows for the ``date, product_id`` pairs in ``keys``, indexed by key."""
+    with conn.cursor() as cursor:
+        cursor.execute(ROWS_SQL, ([d.date() for d in keys["date"]], keys["product_id"].astype(str).tolist()))
+        rows = pd.DataFrame(cursor.fetchall(), columns=FEATURE_COLUMNS)
+    rows["date"] = pd.to_datetime(rows["date"])
+    return rows.set_index(KEY_COLS)
+
+
+def price_changes(latest, stored):
+    """Long ``date, product_id, column, value`` frame of the prices in ``latest`` that differ from ``stored``."""
+    current = stored[COMPETITOR_COLS].reindex(latest.index).astype(float)
+    moved = latest.where(latest.notna() & current.notna() & (latest != current))
+    moved.columns.name = "column"
+    return moved.stack().dropna().rename("value").reset_index()
+
+
+def apply_changes(rows, changes):
+    """Copy of ``rows`` with every changed price written into its own row and its lag1/lag7 rows."""
+    patched = rows.copy()
+    for col, group in changes.groupby("column"):
+        for offset, suffix in LAG_OFFSETS.items():
+            keys = pd.MultiIndex.from_arrays([group["date"] + pd.Timedelta(days=offset), group["product_id"]])
+            positions = patched.index.get_indexer(keys)
+            found = positions >= 0
+            target = col + suffix
+            values = group["value"].to_numpy()[found].astype(patched[target].dtype)
+            patched.iloc[positions[found], patched.columns.get_loc(target)] = values
+    return patched
+
+
+def patch_store(store, changes):
+    """Write changed prices still inside ``store``'s window into it; returns how many were."""
+    if store.last_date is None or changes.empty:
+        return 0
+    age = (pd.Timestamp(store.last_date) - changes["date"]).dt.days.to_numpy()
+    products = store.product_ids.get_indexer(changes["product_id"].astype(str))
+    series = pd.Index(SERIES).get_indexer(changes["column"])
+    inside = (age >= 0) & (age < WINDOW) & (products >= 0)
+    store.history[products[inside], series[inside], WINDOW - 1 - age[inside]] = changes["value"].to_numpy()[inside]
+    return int(inside.sum())
+
+
+# ---------- BATCH ----------
+def reprice_batch(conn, bundle, path, max_lines=BATCH_LINES, recorder=None):
+    """Apply the next batch of events from ``path`` and commit; returns the batch stats."""
+    from pricing.instrumentation import StageRecorder
+    from pricing.loader import copy_upsert
+    from pricing.prediction_cache import CACHE_COLUMNS, cache_frame, predict_cached
+    from pricing.recommendations import refresh_recommendations
+    from pricing.rollups import refresh_rollups
+    from pricing.schema import record_load
+
+    recorder = recorder or StageRecorder("repricing")
+    source = os.path.abspath(path)
+    began = time.perf_counter()
+    stats = {"lines": 0, "events": 0, "rejected": 0, "unknown": 0, "changes": 0, "rows": 0, "scored": 0,
+             "store_patched": 0}
+    cursor = conn.cursor()
+
+    with recorder.stage("read") as stage:
+        events, offset, stats["lines"], stats["rejected"] = read_events(path, read_offset(cursor, source), max_lines)
+        stats["events"] = stage.rows = len(events)
+    if not stats["lines"]:
+        conn.rollback()
+        cursor.close()
+        return stats
+
+    # One round trip fetches each event's row together with the rows one and seven days later.
+    with recorder.stage("diff", rows=len(events)) as stage:
+        latest = events.groupby(KEY_COLS, sort=False)[COMPETITOR_COLS].last()
+        keys = latest.index.to_frame(index=False)
+        rows = fetch_rows(conn, pd.concat([
+            keys.assign(date=keys["date"] + pd.Timedelta(days=offset)) for offset in LAG_OFFSETS
+        ]).drop_duplicates())
+        stats["unknown"] = int((~latest.index.isin(rows.index)).sum())
+        changes = price_changes(latest, rows)
+        patched = apply_changes(rows, changes)
+        touched = (patched[PRICE_COLUMNS] != rows[PRICE_COLUMNS]).any(axis=1).to_numpy()
+        df = patched[touched].reset_index()
+        stats["changes"] = len(changes)
+        stats["rows"] = stage.rows = len(df)
+
+    if len(df):
+        with recorder.stage("upsert_daily_features", rows=len(df)):
+            copy_upsert(conn, "daily_features", df, FEATURE_COLUMNS)
+        with recorder.stage("predict", rows=len(df)) as stage:
+            # Every row here changed, so hashing it could never produce a hit.
+            predictions, hashes, missed, pred_cache = predict_cached(conn, bundle, df, hashed=False)
+            stats["scored"] = stage.rows = pred_cache["scored"]
+        with recorder.stage("upsert_predicted_prices", rows=int(missed.sum())):
+            copy_upsert(conn, "predicted_prices", cache_frame(df, predictions, hashes, bundle.version, missed),
+                        CACHE_COLUMNS)
+        with recorder.stage("rollups", rows=len(df)):
+            dates = df["date"]
+            for _, month in dates.groupby(dates.dt.to_period("M")):
+                refresh_rollups(conn, month.min().date(), month.max().date())
+        with recorder.stage("recommendations"):
+            load_id = record_load(cursor, dates.min().date(), dates.max().date(), len(df))
+            refresh_recommendations(conn, load_id)
+
+    with recorder.stage("commit"):
+        save_offset(cursor, source, offset, stats["lines"])
+        conn.commit()
+    cursor.close()
+
+    # Only after the commit, as the daily job does: the store must never run ahead of the table.
+    if len(changes):
+        store = FeatureStore.load()
+        stats["store_patched"] = patch_store(store, changes)
+        if stats["store_patched"]:
+            store.save()
+    stats["seconds"] = time.perf_counter() - began
+    return stats
+
+
+def format_stats(stats):
+    return (f"repricing: {stats['lines']:,} lines, {stats['events']:,} events "
+            f"({stats['rejected']:,} rejected, {stats['unknown']:,} for rows not loaded); "
+            f"{stats['changes']:,} price changes -> {stats['rows']:,} rows updated, {stats['scored']:,} scored, "
+            f"{stats['store_patched']:,} patched into the feature store; {stats['seconds']:.2f}s")
+
+
+def main():
+    import argparse
+
+    import psycopg2
+
+    from pricing.config import DB_CONFIG, METRICS_FILE, PRICE_STREAM, SCHEMA_MODE
+    from pricing.instrumentation import StageRecorder
+    from pricing.registry import get_model
+    from pricing.rollups import ensure_rollups
+    from pricing.schema import ensure_tables
+
+    parser = argparse.ArgumentParser(description="Reprice rows from a stream of competitor price updates")
+    parser.add_argument("--stream", default=PRICE_STREAM, help="append-only JSONL file of price updates")
+    parser.add_argument("--follow", action="store_true", help="keep polling the stream for new events")
+    parser.add_argument("--interval", type=float, default=POLL_SECONDS, help="seconds between polls with --follow")
+    parser.add_argument("--batch", type=int, default=BATCH_LINES, help="lines applied per transaction")
+    parser.add_argument("--reset", action="store_true", help="re-read the stream from its first line")
+    args = parser.parse_args()
+
+    bundle = get_model()
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cursor:
+            ensure_tables(cursor, mode=SCHEMA_MODE)
+            if args.reset:
+                cursor.execute("DELETE FROM stream_offsets WHERE source = %s", (os.path.abspath(args.stream),))
+        ensure_rollups(conn)
+        conn.commit()
+        while True:
+            recorder = StageRecorder("repricing", METRICS_FILE)
+            stats = reprice_batch(conn, bundle, args.stream, args.batch, recorder)
+            if stats["lines"]:
+                print(format_stats(stats))
+                recorder.finish(events=stats["events"], changes=stats["changes"], rows_repriced=stats["rows"])
+                if stats["lines"] == args.batch:
+                    continue  # more lines are already waiting
+            elif not args.follow:
+                print(f"✅ No new events in {args.stream} "
+                      f"(checked {datetime.now(timezone.utc).isoformat(timespec='seconds')}).")
+            if not args.follow:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Incrementally maintained rollups of ``daily_features`` for the dashboard.
+
+``product_rollups`` holds, per product and day / week / month bucket, the
+row count (``days``) and the sums of the columns the dashboard shows, plus
+the sum of predicted prices. ``rollup_totals`` is one row of global sums.
+After a load, ``refresh_rollups`` recomputes only the buckets overlapping
+the loaded dates (a loaded day touches one day, one week and one month
+bucket per product) and re-sums the totals from the month rows, so the
+cost follows the size of the load, not of the history.
+
+Usage:
+    python -m pricing.rollups --rebuild      # (re)build every bucket from daily_features
+"""
+import time
+
+GRAINS = ("day", "week", "month")
+
+SUM_COLUMNS = ["units_sold", "revenue", "stock", "views", "clicks", "add_to_cart", "purchases",
+               "flipkart_price", "amazon_price", "myntra_price"]
+TOTAL_COLUMNS = ["units_sold", "revenue", "views", "clicks", "add_to_cart", "purchases"]
+
+_BUCKET = "date_trunc(%(grain)s, {col})::date"
+
+DELETE_SQL = f"""
+    DELETE FROM product_rollups
+    WHERE grain = %(grain)s AND period BETWEEN {_BUCKET.format(col="%(start)s::date")}
+                                           AND {_BUCKET.format(col="%(end)s::date")}
+"""
+
+_INSERT = f"""
+    INSERT INTO product_rollups (grain, period, product_id, days, {", ".join(SUM_COLUMNS)},
+                                 predicted_days, predicted_price)
+"""
+
+# Day buckets come from the raw rows; weeks and months re-sum the (already refreshed) days.
+INSERT_DAYS_SQL = _INSERT + f"""
+    SELECT 'day', f.date, f.product_id, count(*),
+           {", ".join(f"sum(f.{col})" for col in SUM_COLUMNS)},
+           count(p.predicted_price), sum(p.predicted_price)
+    FROM daily_features f
+    LEFT JOIN predicted_prices p USING (date, product_id)
+    WHERE f.date BETWEEN %(start)s AND %(end)s
+    GROUP BY 2, 3
+"""
+
+INSERT_SQL = _INSERT + f"""
+    SELECT %(grain)s, {_BUCKET.format(col="period")}, product_id, sum(days),
+           {", ".join(f"sum({col})" for col in SUM_COLUMNS)},
+           sum(predicted_days), sum(predicted_price)
+    FROM product_rollups
+    WHERE grain = 'day'
+      AND period >= {_BUCKET.format(col="%(start)s::date")}
+      AND period < {_BUCKET.format(col="%(end)s::date")} + ('1 ' || %(grain)s)::interval
+    GROUP BY 2, 3
+"""
+
+TOTALS_SQL = f"""
+    INSERT INTO rollup_totals (id, first_date, last_date, days, {", ".join(TOTAL_COLUMNS)})
+    SELECT true,
+           (SELECT min(period) FROM product_rollups WHERE grain = 'day'),
+           (SELECT max(period) FROM product_rollups WHERE grain = 'day'),
+           COALESCE(sum(days), 0), {", ".join(f"sum({col})" for col in TOTAL_COLUMNS)}
+    FROM product_rollups
+    WHERE grain = 'month'
+    ON CONFLICT (id) DO UPDATE SET
+        {", ".join(f"{col} = EXCLUDED.{col}" for col in ["first_date", "last_date", "days"] + TOTAL_COLUMNS)}
+"""
+
+
+def refresh_rollups(conn, start, end):
+    """Recompute every bucket overlapping ``start``..``end`` and the totals row; caller commits."""
+    began = time.perf_counter()
+    rows = 0
+    with conn.cursor() as cursor:
+        for grain in GRAINS:
+            params = {"grain": grain, "start": start, "end": end}
+            cursor.execute(DELETE_SQL, params)
+            cursor.execute(INSERT_DAYS_SQL if grain == "day" else INSERT_SQL, params)
+            rows += cursor.rowcount
+        cursor.execute(TOTALS_SQL)
+    seconds = time.perf_counter() - began
+    return {"table": "product_rollups", "rows": rows, "written": rows, "chunks": len(GRAINS),
+            "seconds": seconds, "rows_per_sec": rows / seconds if seconds else 0.0}
+
+
+def ensure_rollups(conn):
+    """Build the rollups from scratch if ``daily_features`` has rows but no totals exist yet."""
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM rollup_totals")
+        if cursor.fetchone()[0]:
+            return None
+        cursor.execute("SELECT min(date), max(date) FROM daily_features")
+        start, end = cursor.fetchone()
+    if start is None:
+        return None
+    return refresh_rollups(conn, start, end)
+
+
+def main():
+    import argparse
+
+    import psycopg2
+
+    from pricing.config import DB_CONFIG, SCHEMA_MODE
+    from pricing.loader import format_stats
+    from pricing.schema import ensure_tables
+
+    parser = argparse.ArgumentParser(description="Maintain the dashboard rollup tables")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every bucket from daily_features")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    try:
+        with conn.cursor() as cursor:
+            ensure_tables(cursor, mode=SCHEMA_MODE)
+            if args.rebuild:
+                cursor.execute("TRUNCATE product_rollups, rollup_totals")
+        stats = ensure_rollups(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    print(format_stats(stats) if stats else "✅ Rollups already built; use --rebuild to recompute them.")
+
+
+if __name__ == "__main__":
+    main()
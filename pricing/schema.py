@@ -0,0 +1,359 @@
+"""Table management for ``daily_features`` and ``predicted_prices``.
+
+Two modes are supported (``pricing.config.SCHEMA_MODE``):
+
+* ``plain``: ordinary tables, as originally created by the daily job.
+* ``partitioned``: both tables are range-partitioned by month on ``date``.
+  Monthly partitions are created on demand before each load, and old months
+  can be detached (and then archived or dropped) without touching the rest.
+
+Usage:
+    python -m pricing.schema --mode partitioned
+    python -m pricing.schema --migrate                 # plain -> partitioned
+    python -m pricing.schema --detach-before 2024-01-01
+"""
+from datetime import date
+
+DAILY_FEATURES_COLUMNS = """
+    date DATE,
+    product_id VARCHAR(10),
+    brand VARCHAR(50),
+    storage_variant VARCHAR(20),
+    category VARCHAR(20),
+    units_sold INTEGER,
+    revenue INTEGER,
+    stock INTEGER,
+    discount INTEGER,
+    is_festival BOOLEAN,
+    views INTEGER,
+    clicks INTEGER,
+    add_to_cart INTEGER,
+    purchases INTEGER,
+    bounce_rate FLOAT,
+    flipkart_price INTEGER,
+    amazon_price INTEGER,
+    myntra_price INTEGER,
+    day_of_week INTEGER,
+    month INTEGER,
+    is_weekend BOOLEAN,
+    price_lag1 FLOAT,
+    price_rolling1 FLOAT,
+    price_lag7 FLOAT,
+    price_rolling7 FLOAT,
+    flipkart_price_lag1 FLOAT,
+    flipkart_price_lag7 FLOAT,
+    amazon_price_lag1 FLOAT,
+    amazon_price_lag7 FLOAT,
+    myntra_price_lag1 FLOAT,
+    myntra_price_lag7 FLOAT,
+    PRIMARY KEY (date, product_id)
+"""
+
+# Column names of daily_features, in table order
+FEATURE_COLUMNS = [
+    line.split()[0] for line in DAILY_FEATURES_COLUMNS.strip().splitlines()
+    if not line.strip().startswith("PRIMARY KEY")
+]
+
+PREDICTED_PRICES_COLUMNS = """
+    date DATE,
+    product_id VARCHAR(10),
+    predicted_price FLOAT,
+    model_version INTEGER,
+    feature_hash BIGINT,
+    PRIMARY KEY (date, product_id)
+"""
+
+TABLES = {
+    "daily_features": DAILY_FEATURES_COLUMNS,
+    "predicted_prices": PREDICTED_PRICES_COLUMNS,
+}
+
+MODES = ("plain", "partitioned")
+DETACHED_SUFFIX = "_detached"
+
+# One row per committed daily-job load; max(load_id) is the dashboard's freshness watermark.
+PIPELINE_LOADS_DDL = """
+CREATE TABLE IF NOT EXISTS pipeline_loads (
+    load_id BIGSERIAL PRIMARY KEY,
+    loaded_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    rows INTEGER NOT NULL
+)
+"""
+
+# Materialized by pricing/recommendations.py at the end of every daily run.
+PRICE_RECOMMENDATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS price_recommendations (
+    product_id VARCHAR(10) PRIMARY KEY,
+    predicted_price FLOAT,
+    flipkart_price FLOAT,
+    amazon_price FLOAT,
+    myntra_price FLOAT,
+    avg_competitor_price FLOAT,
+    units_sold FLOAT,
+    stock FLOAT,
+    recommendation VARCHAR(20) NOT NULL,
+    high_stock BOOLEAN NOT NULL,
+    low_sales BOOLEAN NOT NULL,
+    load_id BIGINT
+);
+CREATE INDEX IF NOT EXISTS price_recommendations_recommendation_idx
+    ON price_recommendations (recommendation);
+"""
+
+# Progress of resumable backfills (run_daily_prediction.py --start/--end); the lag state
+# is committed in the same transaction as each chunk's rows.
+BACKFILL_CHECKPOINTS_DDL = """
+CREATE TABLE IF NOT EXISTS backfill_checkpoints (
+    backfill_id TEXT PRIMARY KEY,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    seed BIGINT,
+    last_done DATE,
+    chunks_done INTEGER NOT NULL DEFAULT 0,
+    rows BIGINT NOT NULL DEFAULT 0,
+    lag_state BYTEA,
+    completed BOOLEAN NOT NULL DEFAULT false,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# Committed read position of each competitor price stream (pricing/repricing.py), advanced in
+# the same transaction as the rows its events changed.
+STREAM_OFFSETS_DDL = """
+CREATE TABLE IF NOT EXISTS stream_offsets (
+    source TEXT PRIMARY KEY,
+    byte_offset BIGINT NOT NULL DEFAULT 0,
+    events BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+)
+"""
+
+# Pre-aggregated sums of daily_features (and predicted_prices) per product and day, week
+# and month, plus one global totals row; maintained by pricing/rollups.py for the dates
+# each load touches. Means are sums / days.
+ROLLUPS_DDL = """
+CREATE TABLE IF NOT EXISTS product_rollups (
+    grain VARCHAR(5) NOT NULL,
+    period DATE NOT NULL,
+    product_id VARCHAR(10) NOT NULL,
+    days INTEGER NOT NULL,
+    units_sold BIGINT,
+    revenue BIGINT,
+    stock BIGINT,
+    views BIGINT,
+    clicks BIGINT,
+    add_to_cart BIGINT,
+    purchases BIGINT,
+    flipkart_price BIGINT,
+    amazon_price BIGINT,
+    myntra_price BIGINT,
+    predicted_days INTEGER NOT NULL,
+    predicted_price FLOAT,
+    PRIMARY KEY (grain, period, product_id)
+);
+CREATE TABLE IF NOT EXISTS rollup_totals (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    first_date DATE,
+    last_date DATE,
+    days BIGINT NOT NULL,
+    units_sold BIGINT,
+    revenue BIGINT,
+    views BIGINT,
+    clicks BIGINT,
+    add_to_cart BIGINT,
+    purchases BIGINT
+);
+"""
+
+
+# ---------- INTROSPECTION ----------
+def table_kind(cursor, table):
+    """Return ``"plain"``, ``"partitioned"`` or ``None`` if the table does not exist."""
+    cursor.execute(
+        "SELECT c.relkind FROM pg_class c "
+        "WHERE c.oid = to_regclass(%s)", (table,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return "partitioned" if row[0] == "p" else "plain"
+
+
+def partition_name(table, month_start):
+    return f"{table}_y{month_start.year}m{month_start.month:02d}"
+
+
+def detached_name(cursor, name):
+    """First free ``<name>_detached``, ``<name>_detached_2``, ... for a partition being detached."""
+    candidate, n = f"{name}{DETACHED_SUFFIX}", 1
+    while table_kind(cursor, candidate) is not None:
+        n += 1
+        candidate = f"{name}{DETACHED_SUFFIX}_{n}"
+    return candidate
+
+
+def _month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def _next_month(month_start):
+    if month_start.month == 12:
+        return date(month_start.year + 1, 1, 1)
+    return date(month_start.year, month_start.month + 1, 1)
+
+
+# ---------- DDL ----------
+def ensure_tables(cursor, mode="plain"):
+    """Create both tables in ``mode`` if missing; never drops existing data."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown schema mode {mode!r}; expected one of {MODES}")
+    suffix = " PARTITION BY RANGE (date)" if mode == "partitioned" else ""
+    for table, columns in TABLES.items():
+        kind = table_kind(cursor, table)
+        if kind is None:
+            cursor.execute(f"CREATE TABLE {table} ({columns}){suffix}")
+        elif kind != mode:
+            hint = "run `python -m pricing.schema --migrate`" if kind == "plain" else "set PRICING_SCHEMA_MODE=partitioned"
+            raise RuntimeError(f"{table} is a {kind} table but schema mode is {mode!r}; {hint}")
+    cursor.execute("ALTER TABLE daily_features DROP COLUMN IF EXISTS price")
+    # Prediction cache keys (pricing/prediction_cache.py); NULL on rows scored before they existed.
+    cursor.execute("ALTER TABLE predicted_prices ADD COLUMN IF NOT EXISTS model_version INTEGER")
+    cursor.execute("ALTER TABLE predicted_prices ADD COLUMN IF NOT EXISTS feature_hash BIGINT")
+    cursor.execute(PIPELINE_LOADS_DDL)
+    cursor.execute(PRICE_RECOMMENDATIONS_DDL)
+    cursor.execute(BACKFILL_CHECKPOINTS_DDL)
+    cursor.execute(ROLLUPS_DDL)
+    cursor.execute(STREAM_OFFSETS_DDL)
+
+
+def record_load(cursor, start, end, rows):
+    """Append a load marker; call inside the transaction that wrote the rows."""
+    cursor.execute(
+        "INSERT INTO pipeline_loads (start_date, end_date, rows) VALUES (%s, %s, %s) RETURNING load_id",
+        (start, end, rows),
+    )
+    return cursor.fetchone()[0]
+
+
+def ensure_partitions(cursor, start, end, tables=TABLES):
+    """Create the monthly partitions covering ``start``..``end`` for partitioned tables."""
+    for table in tables:
+        if table_kind(cursor, table) != "partitioned":
+            continue
+        attached = {name for name, _ in list_partitions(cursor, table)}
+        month = _month_start(start)
+        while month <= end:
+            upper = _next_month(month)
+            name = partition_name(table, month)
+            if name not in attached:
+                # A table of that name that is not a partition (e.g. one detached before
+                # detaches were renamed) would make CREATE ... IF NOT EXISTS a silent no-op.
+                if table_kind(cursor, name) is not None:
+                    raise RuntimeError(
+                        f"{name} exists but is not a partition of {table}; rename or drop it, "
+                        f"or re-attach it with ALTER TABLE {table} ATTACH PARTITION {name} "
+                        f"FOR VALUES FROM ('{month}') TO ('{upper}')"
+                    )
+                cursor.execute(
+                    f"CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                    (month, upper),
+                )
+            month = upper
+
+
+def list_partitions(cursor, table):
+    """``[(partition_name, lower_bound), ...]`` ordered by month."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname", (table,)
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        year, month = name.rsplit("_y", 1)[1].split("m")
+        partitions.append((name, date(int(year), int(month), 1)))
+    return partitions
+
+
+def detach_partitions_before(cursor, before, tables=TABLES):
+    """Detach every monthly partition that ends on or before ``before``.
+
+    Detached partitions stay as standalone tables, renamed with a
+    ``_detached`` suffix so the month can be loaded again later, and can be
+    dumped, moved to cheaper storage or dropped independently. Detaching a
+    month that was loaded again keeps the earlier copy and numbers the new
+    one (``_detached_2``, ``_detached_3``, ...).
+    """
+    detached = []
+    for table in tables:
+        for name, month in list_partitions(cursor, table):
+            if _next_month(month) <= before:
+                target = detached_name(cursor, name)
+                cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                cursor.execute(f"ALTER TABLE {name} RENAME TO {target}")
+                detached.append(target)
+    return detached
+
+
+def migrate_to_partitioned(cursor):
+    """Rebuild plain tables as partitioned ones, copying existing rows across."""
+    for table, columns in TABLES.items():
+        if table_kind(cursor, table) != "plain":
+            continue
+        legacy = f"{table}_legacy"
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        cursor.execute(f"ALTER TABLE {legacy} RENAME CONSTRAINT {table}_pkey TO {legacy}_pkey")
+        cursor.execute(f"CREATE TABLE {table} ({columns}) PARTITION BY RANGE (date)")
+        cursor.execute(f"SELECT min(date), max(date) FROM {legacy}")
+        start, end = cursor.fetchone()
+        if start is not None:
+            ensure_partitions(cursor, start, end, tables=[table])
+        cursor.execute(f"""
+            SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+            FROM information_schema.columns
+            WHERE table_name = %s AND column_name IN (
+                SELECT column_name FROM information_schema.columns WHERE table_name = %s
+            )
+        """, (table, legacy))
+        (column_list,) = cursor.fetchone()
+        cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {legacy}")
+        cursor.execute(f"DROP TABLE {legacy}")
+
+
+def main():
+    import argparse
+
+    import psycopg2
+
+    from pricing.config import DB_CONFIG, SCHEMA_MODE
+
+    parser = argparse.ArgumentParser(description="Manage daily_features / predicted_prices tables")
+    parser.add_argument("--mode", choices=MODES, default=SCHEMA_MODE)
+    parser.add_argument("--migrate", action="store_true", help="convert plain tables to monthly partitions")
+    parser.add_argument("--detach-before", type=date.fromisoformat, metavar="YYYY-MM-DD",
+                        help="detach partitions whose month ends on or before this date")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    if args.migrate:
+        migrate_to_partitioned(cursor)
+        args.mode = "partitioned"
+    ensure_tables(cursor, mode=args.mode)
+    if args.detach_before:
+        for name in detach_partitions_before(cursor, args.detach_before):
+            print(f"Detached {name}")
+    for table in TABLES:
+        kind = table_kind(cursor, table)
+        count = len(list_partitions(cursor, table)) if kind == "partitioned" else 0
+        print(f"{table}: {kind}" + (f" ({count} partitions)" if kind == "partitioned" else ""))
+    conn.commit()
+    cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Long-running local price-scoring service with micro-batching.
+
+The model bundle (booster, feature order and frozen categorical codes) is
+resolved through the model registry (the current version, or
+``PRICING_MODEL_VERSION`` / ``--model-version``) and loaded once at start-up. Concurrent requests are queued and
+coalesced by a single worker thread into one float32 matrix per
+micro-batch, scored with ``Booster.inplace_predict`` (no DMatrix per call).
+
+Endpoints:
+    POST /predict   {"rows": [{"product_id": "M105", "units_sold": 12, ...}, ...]}   -> {"predicted_price": [...]}
+                    {"instances": [[...29 encoded values in model feature order...], ...]}
+    GET  /metrics   request/row/batch counters, throughput and p50/p99 latency
+    GET  /health
+
+Usage:
+    python -m pricing.serve --port 8600 --max-batch 256 --max-wait-ms 2
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from pricing.model_bundle import ModelBundle
+from pricing.registry import get_model
+
+LATENCY_WINDOW = 10_000
+
+
+class MicroBatcher:
+    """Coalesce concurrent ``submit`` calls into batched ``inplace_predict`` calls."""
+
+    def __init__(self, booster, max_batch=256, max_wait_ms=2.0):
+        self.booster = booster
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._started = time.perf_counter()
+        self.requests = self.rows = self.batches = self.errors = 0
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, matrix):
+        """Queue a ``(n, n_features)`` float32 matrix; returns a Future of predictions."""
+        future = Future()
+        self._queue.put((matrix, future, time.perf_counter()))
+        return future
+
+    def predict(self, matrix, timeout=10.0):
+        return self.submit(matrix).result(timeout=timeout)
+
+    def _collect(self):
+        pending = [self._queue.get()]
+        n_rows = len(pending[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while n_rows < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            n_rows += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            matrices = [item[0] for item in pending]
+            try:
+                preds = self.booster.inplace_predict(np.concatenate(matrices))
+            except Exception as exc:  # surface model errors to every waiting caller
+                for _, future, _ in pending:
+                    future.set_exception(exc)
+                with self._lock:
+                    self.errors += len(pending)
+                continue
+
+            done = time.perf_counter()
+            offset = 0
+            for matrix, future, queued_at in pending:
+                future.set_result(preds[offset:offset + len(matrix)])
+                offset += len(matrix)
+            with self._lock:
+                self.requests += len(pending)
+                self.rows += offset
+                self.batches += 1
+                self._latencies.extend(done - queued_at for _, _, queued_at in pending)
+
+    def metrics(self):
+        with self._lock:
+            latencies = np.fromiter(self._latencies, dtype=float)
+            elapsed = time.perf_counter() - self._started
+            p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if len(latencies) else (0.0, 0.0)
+            return {
+                "requests": self.requests,
+                "rows": self.rows,
+                "batches": self.batches,
+                "errors": self.errors,
+                "avg_batch_rows": self.rows / self.batches if self.batches else 0.0,
+                "requests_per_sec": self.requests / elapsed,
+                "rows_per_sec": self.rows / elapsed,
+                "latency_p50_ms": float(p50),
+                "latency_p99_ms": float(p99),
+                "uptime_sec": elapsed,
+            }
+
+
+def rows_to_matrix(bundle, payload):
+    """Build the float32 model matrix from a ``rows`` or ``instances`` payload."""
+    n_features = len(bundle.features)
+    if "instances" in payload:
+        matrix = np.asarray(payload["instances"], dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[1] != n_features:
+            raise ValueError(f"instances must be a list of {n_features}-value rows")
+        return matrix
+    rows = payload.get("rows")
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("payload needs a non-empty 'rows' or 'instances' list")
+    return np.stack([bundle.row_vector(row) for row in rows])
+
+
+def make_handler(bundle, batcher):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                self._send(200, batcher.metrics())
+            elif self.path == "/health":
+                self._send(200, {"status": "ok", "model_version": bundle.version, "features": bundle.features})
+            else:
+                self._send(404, {"error": f"unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                self._send(404, {"error": f"unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                matrix = rows_to_matrix(bundle, json.loads(self.rfile.read(length)))
+            except (ValueError, TypeError, AttributeError) as exc:
+                self._send(400, {"error": str(exc)})
+                return
+            try:
+                preds = batcher.predict(matrix)
+            except Exception as exc:
+                self._send(500, {"error": str(exc)})
+                return
+            self._send(200, {"predicted_price": preds.tolist()})
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Micro-batching XGBoost price-scoring service")
+    parser.add_argument("--model-version", type=int, help="registered model version (default: the current one)")
+    parser.add_argument("--bundle", help="serve this bundle directory instead of a registered version")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=256, help="rows per micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="max time to wait for a batch to fill")
+    parser.add_argument("--nthread", type=int, default=0, help="XGBoost threads (0 = all cores)")
+    args = parser.parse_args()
+
+    bundle = ModelBundle.load(args.bundle) if args.bundle else get_model(args.model_version)
+    if args.nthread:
+        bundle.booster.set_param({"nthread": args.nthread})
+    batcher = MicroBatcher(bundle.booster, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(bundle, batcher))
+    print(f"✅ Scoring service on http://{args.host}:{args.port} (model bundle v{bundle.version}: {bundle.path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Seeded, vectorized generator for the sales, behavior and competitor tables.
+
+Rows follow the rules of the generators in ``notebooks/datasets.ipynb``
+(festival discounts and demand, behavior funnel scaled by purchases,
+competitor prices around our price), drawn as whole NumPy arrays per chunk
+of days instead of one ``random`` call per value. Any number of products
+and any date range can be generated; chunks are date-ordered and can be
+streamed to CSV, Parquet or the ``daily_features`` table.
+
+Usage:
+    python -m pricing.synthetic --products 27400 --start 2024-01-01 --end 2024-12-31 --format parquet --out data/synthetic
+    python -m pricing.synthetic --products 1000 --days 90 --format pg
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+CHUNK_DAYS = 30
+
+# Month-day of the festivals in the original 2024 data; they repeat every year.
+FESTIVAL_DAYS = ["01-15", "03-25", "04-10", "06-17", "08-19", "08-26", "08-28", "09-07", "10-03", "11-01", "12-25"]
+
+MOBILES = [
+    ("Samsung", "Galaxy M14", "64GB"), ("Samsung", "Galaxy A15", "128GB"),
+    ("Redmi", "Note 12", "128GB"), ("Redmi", "12C", "64GB"),
+    ("Realme", "Narzo 60", "128GB"), ("Realme", "C55", "64GB"),
+    ("iQOO", "Z7 5G", "128GB"), ("iQOO", "Neo 7 Pro", "256GB"),
+    ("OnePlus", "Nord CE 3 Lite", "128GB"), ("OnePlus", "Nord 3 5G", "256GB"),
+    ("Motorola", "G73 5G", "128GB"), ("Motorola", "Edge 40 Neo", "128GB"),
+    ("Vivo", "T2 5G", "128GB"), ("Vivo", "Y27", "64GB"),
+    ("Oppo", "A78", "128GB"), ("Oppo", "Reno8 T", "128GB"),
+    ("Poco", "X5 Pro", "256GB"), ("Poco", "M6 Pro", "128GB"),
+    ("Infinix", "Zero 5G 2023", "128GB"), ("Tecno", "Spark 10", "64GB"),
+]
+
+TABLES = {
+    "sales": ["date", "product_id", "product_name", "brand", "storage_variant", "category",
+              "price", "units_sold", "revenue", "stock", "discount"],
+    "behavior": ["date", "product_id", "views", "clicks", "add_to_cart", "purchases", "bounce_rate"],
+    "competitors": ["date", "product_id", "product_name", "flipkart_price", "amazon_price", "myntra_price"],
+}
+FILE_NAMES = {"sales": "mobile_sales", "behavior": "customer_behavior", "competitors": "competitor_prices"}
+
+
+def catalog(n_products):
+    """``n_products`` products: the 20 original phones, then numbered variants of them."""
+    idx = np.arange(n_products)
+    brand, model, storage = (np.array(col, dtype=object) for col in zip(*MOBILES))
+    base = idx % len(MOBILES)
+    names = model[base].copy()
+    variant = idx >= len(MOBILES)
+    names[variant] = names[variant] + " #" + (idx[variant] // len(MOBILES)).astype(str)
+    return pd.DataFrame({
+        "product_id": "M" + (idx + 100).astype(str).astype(object),
+        "product_name": names,
+        "brand": brand[base],
+        "storage_variant": storage[base],
+        "category": "Mobile",
+    })
+
+
+def _tile_categorical(values, reps):
+    """``np.tile`` for a string column, as a categorical (no per-row string objects)."""
+    codes, uniques = pd.factorize(np.asarray(values))
+    return pd.Categorical.from_codes(np.tile(codes, reps), uniques)
+
+
+def is_festival(dates):
+    return pd.DatetimeIndex(dates).strftime("%m-%d").isin(FESTIVAL_DAYS)
+
+
+# ---------- TABLE GENERATORS ----------
+def sales_rows(products, dates, rng):
+    """One sales row per ``(date, product)``; festival days get deeper discounts and more demand."""
+    dates = pd.DatetimeIndex(dates)
+    n_products, n = len(products), len(dates) * len(products)
+    festival = np.repeat(is_festival(dates), n_products)
+
+    base_price = rng.integers(10000, 30000, n, endpoint=True)
+    discount = np.where(festival, rng.choice([10, 20, 30], n), rng.choice([0, 5, 10], n))
+    price = (base_price * (1 - discount / 100)).astype(np.int64)
+    stock = rng.integers(30, 150, n, endpoint=True)
+    low = np.where(festival, 10, 1)
+    high = np.minimum(stock, np.where(festival, 70, 40))
+    units_sold = rng.integers(low, high, endpoint=True)
+
+    sales = pd.DataFrame({"date": np.repeat(dates.values, n_products)})
+    for col in ("product_id", "product_name", "brand", "storage_variant", "category"):
+        sales[col] = _tile_categorical(products[col] if col in products else [""] * n_products, len(dates))
+    sales["price"] = price
+    sales["units_sold"] = units_sold
+    sales["revenue"] = price * units_sold
+    sales["stock"] = stock
+    sales["discount"] = discount
+    sales["is_festival"] = festival
+    return sales
+
+
+def behavior_rows(sales, rng):
+    """Views, clicks and add-to-cart drawn as fractions of the previous funnel step."""
+    n = len(sales)
+    purchases = sales["units_sold"].to_numpy()
+    views = rng.integers(purchases * 10, purchases * 30, endpoint=True)
+    clicks = rng.integers((views * 0.1).astype(np.int64), (views * 0.4).astype(np.int64), endpoint=True)
+    add_to_cart = rng.integers((clicks * 0.2).astype(np.int64), (clicks * 0.8).astype(np.int64), endpoint=True)
+    return pd.DataFrame({
+        "date": sales["date"].to_numpy(),
+        "product_id": sales["product_id"].array,
+        "views": views,
+        "clicks": clicks,
+        "add_to_cart": add_to_cart,
+        "purchases": purchases,
+        "bounce_rate": rng.uniform(20, 80, n).round(2),
+    })
+
+
+def competitor_rows(sales, rng):
+    """Competitor prices within a marketplace-specific band around our price."""
+    n = len(sales)
+    price = sales["price"].to_numpy()
+    return pd.DataFrame({
+        "date": sales["date"].to_numpy(),
+        "product_id": sales["product_id"].array,
+        "product_name": sales["product_name"].array,
+        "flipkart_price": (price * rng.uniform(0.95, 1.10, n)).astype(np.int64),
+        "amazon_price": (price * rng.uniform(0.90, 1.12, n)).astype(np.int64),
+        "myntra_price": (price * rng.uniform(0.92, 1.08, n)).astype(np.int64),
+    })
+
+
+def generate(products, start, end, seed=42, chunk_days=CHUNK_DAYS):
+    """Yield ``{"sales", "behavior", "competitors"}`` frames, ``chunk_days`` dates at a time.
+
+    The output is fully determined by ``seed`` and ``chunk_days``; ``seed=None``
+    draws fresh entropy.
+    """
+    dates = pd.date_range(start, end, freq="D")
+    seeds = np.random.SeedSequence(seed).spawn((len(dates) + chunk_days - 1) // chunk_days)
+    for chunk, chunk_seed in enumerate(seeds):
+        rng = np.random.default_rng(chunk_seed)
+        sales = sales_rows(products, dates[chunk * chunk_days:(chunk + 1) * chunk_days], rng)
+        yield {
+            "sales": sales,
+            "behavior": behavior_rows(sales, rng),
+            "competitors": competitor_rows(sales, rng),
+        }
+
+
+def daily_rows(tables):
+    """Join one chunk of the three tables into the daily job's row layout (without lags)."""
+    sales = tables["sales"]
+    df = sales.drop(columns=["product_name"]).copy()
+    for col in ("views", "clicks", "add_to_cart", "bounce_rate"):
+        df[col] = tables["behavior"][col].to_numpy()
+    df["purchases"] = tables["behavior"]["purchases"].to_numpy()
+    for col in ("flipkart_price", "amazon_price", "myntra_price"):
+        df[col] = tables["competitors"][col].to_numpy()
+    dates = pd.DatetimeIndex(df["date"])
+    df["day_of_week"] = dates.dayofweek
+    df["month"] = dates.month
+    df["is_weekend"] = df["day_of_week"] >= 5
+    return df
+
+
+# ---------- WRITERS ----------
+def write_csv(chunks, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, f"{FILE_NAMES[name]}.csv") for name in TABLES}
+    rows = 0
+    for i, tables in enumerate(chunks):
+        for name, columns in TABLES.items():
+            frame = tables[name][columns]
+            frame.to_csv(paths[name], mode="w" if i == 0 else "a", header=i == 0, index=False, date_format="%Y-%m-%d")
+        rows += len(tables["sales"])
+    return rows
+
+
+def write_parquet(chunks, out_dir):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(out_dir, exist_ok=True)
+    writers = {}
+    rows = 0
+    try:
+        for tables in chunks:
+            for name, columns in TABLES.items():
+                table = pa.Table.from_pandas(tables[name][columns], preserve_index=False)
+                table = table.set_column(0, "date", table.column("date").cast(pa.date32()))
+                if name not in writers:
+                    path = os.path.join(out_dir, f"{FILE_NAMES[name]}.parquet")
+                    writers[name] = pq.ParquetWriter(path, table.schema, compression="zstd")
+                writers[name].write_table(table)
+            rows += len(tables["sales"])
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return rows
+
+
+def write_daily_features(chunks, conn, schema_mode="plain"):
+    """Stream the joined rows, with lags carried across chunks, into ``daily_features``.
+
+    Refreshes the dashboard rollups and records the load in ``pipeline_loads``;
+    the caller commits.
+    """
+    from pricing.feature_store import FeatureStore
+    from pricing.loader import copy_upsert
+    from pricing.rollups import refresh_rollups
+    from pricing.schema import FEATURE_COLUMNS, ensure_partitions, ensure_tables, record_load
+
+    store = FeatureStore()
+    cursor = conn.cursor()
+    ensure_tables(cursor, mode=schema_mode)
+    span = []
+
+    def frames():
+        for tables in chunks:
+            df = daily_rows(tables)
+            df = df.join(pd.concat([store.advance(day_df) for _, day_df in df.groupby("date", sort=True)]))
+            first, last = df["date"].min().date(), df["date"].max().date()
+            ensure_partitions(cursor, first, last)
+            span.extend([first, last])
+            yield df
+
+    stats = copy_upsert(conn, "daily_features", frames(), FEATURE_COLUMNS)
+    if span:
+        refresh_rollups(conn, min(span), max(span))
+        record_load(cursor, min(span), max(span), stats["rows"])
+    cursor.close()
+    return stats
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic sales, behavior and competitor data")
+    parser.add_argument("--products", type=int, default=len(MOBILES))
+    parser.add_argument("--start", default="2024-01-01")
+    parser.add_argument("--end", help="last date (default: --days after --start, or 2024-12-31)")
+    parser.add_argument("--days", type=int, help="number of days instead of --end")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-days", type=int, default=CHUNK_DAYS)
+    parser.add_argument("--format", choices=["csv", "parquet", "pg"], default="csv")
+    parser.add_argument("--out", default=os.path.join("data", "synthetic"), help="output directory for csv/parquet")
+    args = parser.parse_args()
+
+    start = pd.Timestamp(args.start)
+    if args.days:
+        end = start + pd.Timedelta(days=args.days - 1)
+    else:
+        end = pd.Timestamp(args.end or "2024-12-31")
+
+    products = catalog(args.products)
+    chunks = generate(products, start, end, args.seed, args.chunk_days)
+    began = time.perf_counter()
+    if args.format == "pg":
+        import psycopg2
+
+        from pricing.config import DB_CONFIG, SCHEMA_MODE
+
+        conn = psycopg2.connect(**DB_CONFIG)
+        try:
+            stats = write_daily_features(chunks, conn, SCHEMA_MODE)
+            conn.commit()
+        finally:
+            conn.close()
+        rows, target = stats["rows"], "daily_features"
+    elif args.format == "parquet":
+        rows, target = write_parquet(chunks, args.out), args.out
+    else:
+        rows, target = write_csv(chunks, args.out), args.out
+    seconds = time.perf_counter() - began
+    print(f"✅ {rows:,} rows x 3 tables ({args.products:,} products, {start.date()}..{end.date()}) "
+          f"written to {target} in {seconds:.2f}s ({rows / seconds:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
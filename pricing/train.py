@@ -0,0 +1,200 @@
+"""Headless training of the price model.
+
+Features are built chunk by chunk through an ``xgboost.DataIter``: each
+chunk holds the full history of a group of products, so lags are exact,
+and categorical codes come from a vocabulary collected up front, so they
+match one global ``astype("category")``. The iterator feeds a
+``QuantileDMatrix`` (hist histograms built without materializing the whole
+matrix) or, with ``--external-memory``, an ``ExtMemQuantileDMatrix`` whose
+pages are cached on disk, so datasets larger than RAM can be trained.
+Rows on or after ``--valid-from`` form the early-stopping set.
+
+Usage:
+    python -m pricing.train --out model/xgb_price_model.ubj --register --version 2
+    python -m pricing.train --external-memory --chunk-products 5
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from pricing.datasets import CACHE_DIR, load_dataset
+from pricing.features import CAT_COLS, TRAINED_FEATURES, build_features
+from pricing.instrumentation import format_rss, peak_rss_mb
+
+# Parameters from the training notebook, with histogram tree building
+PARAMS = {
+    "objective": "reg:squarederror",
+    "tree_method": "hist",
+    "max_depth": 3,
+    "learning_rate": 0.05,
+    "subsample": 0.6,
+    "colsample_bytree": 0.6,
+    "alpha": 4,
+    "lambda": 6,
+    "seed": 42,
+}
+NUM_BOOST_ROUND = 1000
+EARLY_STOPPING_ROUNDS = 50
+VALID_FROM = "2024-10-01"
+CHUNK_PRODUCTS = 50
+
+# Relative noise added to the target and units before features, as in the notebook
+NOISE = {"price": 0.15, "units_sold": 0.20}
+
+
+# ---------- CHUNKED FEATURES ----------
+def collect_vocab(dataset="preprocessed"):
+    """Sorted values of every categorical column (the codes ``astype("category")`` would give)."""
+    df = load_dataset(dataset, columns=CAT_COLS)
+    return {col: sorted(pd.unique(df[col].astype(str))) for col in CAT_COLS}
+
+
+def product_groups(vocab, chunk_products=CHUNK_PRODUCTS):
+    products = vocab["product_id"]
+    return [products[i:i + chunk_products] for i in range(0, len(products), chunk_products)]
+
+
+def build_chunk(dataset, products, vocab, noise_seed=None):
+    """Feature rows (with ``price`` and ``date``) for every day of ``products``."""
+    df = load_dataset(dataset, filters=[("product_id", "in", list(products))])
+    for col in CAT_COLS:
+        df[col] = pd.Categorical(df[col].astype(str), categories=vocab[col])
+    if noise_seed is not None:
+        rng = np.random.default_rng(noise_seed)
+        for col, scale in NOISE.items():
+            noisy = df[col].to_numpy(dtype=float) * (1 + rng.uniform(-scale, scale, len(df)))
+            df[col] = noisy if col == "price" else noisy.astype(int)
+    return build_features(df)
+
+
+class FeatureChunks(xgb.DataIter):
+    """Re-iterable source of ``(X, y)`` chunks, restricted to one side of the time split."""
+
+    def __init__(self, dataset, groups, vocab, valid_from, validation, seed=None, cache_prefix=None):
+        self.dataset = dataset
+        self.groups = groups
+        self.vocab = vocab
+        self.valid_from = pd.Timestamp(valid_from)
+        self.validation = validation
+        self.seed = seed
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix, release_data=True)
+
+    def next(self, input_data):
+        if self._it == len(self.groups):
+            return 0
+        noise_seed = None if self.seed is None else self.seed + self._it
+        df = build_chunk(self.dataset, self.groups[self._it], self.vocab, noise_seed)
+        mask = (df["date"] >= self.valid_from) == self.validation
+        df = df[mask]
+        input_data(
+            data=df[TRAINED_FEATURES].to_numpy(dtype=np.float32),
+            label=df["price"].to_numpy(dtype=np.float32),
+            feature_names=TRAINED_FEATURES,
+        )
+        self._it += 1
+        return 1
+
+    def reset(self):
+        self._it = 0
+
+
+# ---------- TRAINING ----------
+def train(dataset="preprocessed", valid_from=VALID_FROM, chunk_products=CHUNK_PRODUCTS,
+          external_memory=False, noise_seed=42, params=None, num_boost_round=NUM_BOOST_ROUND):
+    """Train with early stopping on the time split; returns ``(booster, vocab, report)``."""
+    params = {**PARAMS, **(params or {})}
+    start = time.perf_counter()
+    vocab = collect_vocab(dataset)
+    groups = product_groups(vocab, chunk_products)
+
+    cache_prefix = os.path.join(CACHE_DIR, "xgb_pages", "train") if external_memory else None
+    if cache_prefix:
+        os.makedirs(os.path.dirname(cache_prefix), exist_ok=True)
+    train_iter = FeatureChunks(dataset, groups, vocab, valid_from, False, noise_seed, cache_prefix)
+    valid_iter = FeatureChunks(dataset, groups, vocab, valid_from, True, noise_seed,
+                               cache_prefix and cache_prefix.replace("train", "valid"))
+    if external_memory:
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter, max_bin=256)
+        dvalid = xgb.ExtMemQuantileDMatrix(valid_iter, ref=dtrain)
+    else:
+        dtrain = xgb.QuantileDMatrix(train_iter, max_bin=256)
+        dvalid = xgb.QuantileDMatrix(valid_iter, ref=dtrain)
+    matrix_sec = time.perf_counter() - start
+
+    train_start = time.perf_counter()
+    booster = xgb.train(
+        params, dtrain, num_boost_round,
+        evals=[(dvalid, "valid")], early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False,
+    )
+    train_sec = time.perf_counter() - train_start
+    best_iteration = booster.best_iteration
+    booster = booster[: best_iteration + 1]  # keep only the trees up to the best round
+
+    report = {
+        "dataset": dataset,
+        "valid_from": str(valid_from),
+        "external_memory": external_memory,
+        "chunks": len(groups),
+        "train_rows": dtrain.num_row(),
+        "valid_rows": dvalid.num_row(),
+        "best_iteration": best_iteration,
+        "trees": booster.num_boosted_rounds(),
+        "valid_rmse": float(booster.eval(dvalid, "valid").split(":")[1]),
+        "matrix_seconds": matrix_sec,
+        "train_seconds": train_sec,
+        "total_seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return booster, vocab, report
+
+
+def main():
+    import argparse
+    import json
+
+    from pricing.model_bundle import ModelBundle
+
+    parser = argparse.ArgumentParser(description="Train the XGBoost price model")
+    parser.add_argument("--dataset", default="preprocessed")
+    parser.add_argument("--out", default=os.path.join("model", "xgb_price_model.ubj"),
+                        help="model file; the format follows the extension (.json or .ubj)")
+    parser.add_argument("--bundle", help="also write a model bundle directory (booster + vocabulary)")
+    parser.add_argument("--register", action="store_true",
+                        help="save the bundle as model/price_model_v<version> in the model registry")
+    parser.add_argument("--promote", action="store_true", help="make the registered version current")
+    parser.add_argument("--version", type=int, default=1, help="bundle version")
+    parser.add_argument("--valid-from", default=VALID_FROM, help="first date of the early-stopping set")
+    parser.add_argument("--chunk-products", type=int, default=CHUNK_PRODUCTS)
+    parser.add_argument("--external-memory", action="store_true", help="cache feature pages on disk")
+    parser.add_argument("--no-noise", action="store_true", help="train on the data as stored")
+    parser.add_argument("--nthread", type=int, default=0)
+    args = parser.parse_args()
+
+    params = {"nthread": args.nthread} if args.nthread else None
+    booster, vocab, report = train(
+        args.dataset, args.valid_from, args.chunk_products, args.external_memory,
+        None if args.no_noise else PARAMS["seed"], params,
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    booster.save_model(args.out)
+    bundle = ModelBundle(booster, TRAINED_FEATURES, vocab, args.version,
+                         {"train_cutoff": str(pd.Timestamp(args.valid_from).date()), "training": report})
+    if args.bundle:
+        bundle.save(args.bundle)
+    if args.register:
+        from pricing.registry import register
+
+        entry = register(bundle, promote=args.promote)
+        print(f"Registered model v{entry['version']} ({entry['sha256'][:12]})")
+
+    print(json.dumps(report, indent=2))
+    print(f"✅ {report['trees']} trees trained in {report['train_seconds']:.2f}s "
+          f"(peak RSS {format_rss(report['peak_rss_mb'])}); model written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,92 +1,30 @@
+import argparse
+import numpy as np
 import psycopg2
 import pandas as pd
 from datetime import date, timedelta
-import random
-import xgboost as xgb
-
-# ---------- DB CONFIG ----------
-DB_CONFIG = {
-    "host": "localhost",
-    "port": 5432,
-    "user": "postgres",
-    "password": "hiba0702",
-    "database": "pricing_engine"
-}
-
-# ---------- LOAD SAVED XGBOOST MODEL ----------
-model = xgb.Booster()
-model.load_model(r"C:\Users\ASUS\Documents\Dynamic_pricing_engine\notebooks\xgb_price_model.json")
-
-# ---------- FEATURES ----------
-trained_features = [
-    "product_id", "brand", "storage_variant", "category", "units_sold",
-    "revenue", "stock", "discount", "views", "clicks", "add_to_cart",
-    "purchases", "bounce_rate", "flipkart_price", "amazon_price",
-    "myntra_price", "day_of_week", "month", "is_weekend",
-    "price_lag1", "price_rolling1", "price_lag7", "price_rolling7",
-    "flipkart_price_lag1", "flipkart_price_lag7",
-    "amazon_price_lag1", "amazon_price_lag7",
-    "myntra_price_lag1", "myntra_price_lag7"
-]
+from pricing.backfill import backfill_id, chunk_seed, load_checkpoint, month_chunks, save_checkpoint, start_checkpoint
+from pricing.config import DB_CONFIG, METRICS_FILE, PROFILE, PROFILE_DIR, SCHEMA_MODE, SCORING_WORKERS
+from pricing.feature_store import FeatureStore
+from pricing.instrumentation import StageRecorder
+from pricing.loader import copy_upsert, format_stats
+from pricing.parallel_scoring import format_timings, score_sharded
+from pricing.prediction_cache import CACHE_COLUMNS, cache_frame, cache_stats, lookup_cached, predict_cached
+from pricing.recommendations import refresh_recommendations
+from pricing.registry import get_model
+from pricing.rollups import ensure_rollups, refresh_rollups
+from pricing.schema import FEATURE_COLUMNS, ensure_partitions, ensure_tables, record_load
+from pricing.synthetic import daily_rows, generate
 
-CAT_COLS = ["brand", "storage_variant", "category", "product_id"]
-LAG_COLS = [col for col in trained_features if "lag" in col or "rolling" in col]
-
-# ---------- CONNECT ----------
-conn = psycopg2.connect(**DB_CONFIG)
-cursor = conn.cursor()
-
-# ---------- CREATE TABLES IF NOT EXISTS ----------
-cursor.execute("DROP TABLE IF EXISTS daily_features;")
-cursor.execute("""
-CREATE TABLE daily_features (
-    date DATE,
-    product_id VARCHAR(10),
-    brand VARCHAR(50),
-    storage_variant VARCHAR(20),
-    category VARCHAR(20),
-    units_sold INTEGER,
-    revenue INTEGER,
-    stock INTEGER,
-    discount INTEGER,
-    is_festival BOOLEAN,
-    views INTEGER,
-    clicks INTEGER,
-    add_to_cart INTEGER,
-    purchases INTEGER,
-    bounce_rate FLOAT,
-    flipkart_price INTEGER,
-    amazon_price INTEGER,
-    myntra_price INTEGER,
-    day_of_week INTEGER,
-    month INTEGER,
-    is_weekend BOOLEAN,
-    price_lag1 FLOAT,
-    price_rolling1 FLOAT,
-    price_lag7 FLOAT,
-    price_rolling7 FLOAT,
-    flipkart_price_lag1 FLOAT,
-    flipkart_price_lag7 FLOAT,
-    amazon_price_lag1 FLOAT,
-    amazon_price_lag7 FLOAT,
-    myntra_price_lag1 FLOAT,
-    myntra_price_lag7 FLOAT,
-    PRIMARY KEY (date, product_id)
-);
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS predicted_prices (
-    date DATE,
-    product_id VARCHAR(10),
-    predicted_price FLOAT,
-    PRIMARY KEY (date, product_id)
-);
-""")
-
-# ---------- DROP OLD PRICE COLUMN IF EXISTS ----------
-cursor.execute("ALTER TABLE daily_features DROP COLUMN IF EXISTS price;")
-conn.commit()
+# ---------- ARGUMENTS ----------
+# Without arguments: the daily run over the last 30 days. With --start/--end: a resumable
+# backfill of that range in calendar-month chunks (see pricing/backfill.py).
+parser = argparse.ArgumentParser(description="Daily feature build and price prediction")
+parser.add_argument("--start", type=date.fromisoformat, metavar="YYYY-MM-DD", help="backfill from this date")
+parser.add_argument("--end", type=date.fromisoformat, metavar="YYYY-MM-DD", help="backfill up to this date (default: yesterday)")
+parser.add_argument("--seed", type=int, default=42, help="backfill data seed; chunks are reproducible per seed")
+parser.add_argument("--restart", action="store_true", help="ignore the backfill's checkpoint and start over")
+parser.add_argument("--max-chunks", type=int, help="stop after this many chunks (resume later)")
 
 # ---------- PRODUCT LIST ----------
 products = [
@@ -104,105 +42,220 @@ products = [
 ]
 
 
-# ---------- DATE RANGE ----------
-end_date = date.today() - timedelta(days=1)
-start_date = end_date - timedelta(days=30)  # Last 30 days
-date_list = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
-
-# ---------- PREPARE DATAFRAME ----------
-all_rows = []
-
-for current_date in date_list:
-    for prod in products:
-        units_sold = random.randint(1, 30)
-        price = random.randint(10000, 50000)
-        is_festival = random.choice([True, False])
-        is_weekend = current_date.weekday() >= 5
-
-        row = {
-            "date": current_date,
-            "product_id": prod["product_id"],
-            "brand": prod["brand"],
-            "storage_variant": prod["storage_variant"],
-            "category": prod["category"],
-            "units_sold": units_sold,
-            "revenue": price * units_sold,
-            "stock": random.randint(40, 120),
-            "discount": random.randint(0, 10),
-            "is_festival": is_festival,
-            "views": random.randint(100, 700),
-            "clicks": random.randint(30, 100),
-            "add_to_cart": random.randint(0, 70),
-            "purchases": random.randint(1, units_sold),
-            "bounce_rate": round(random.uniform(30, 80), 2),
-            "flipkart_price": random.randint(10000, 50000),
-            "amazon_price": random.randint(10000, 50000),
-            "myntra_price": random.randint(10000, 50000),
-            "day_of_week": current_date.weekday(),
-            "month": current_date.month,
-            "is_weekend": is_weekend,
-        }
-        # initialize lag columns to 0
-        for col in LAG_COLS:
-            row[col] = 0
-        all_rows.append(row)
-
-df = pd.DataFrame(all_rows)
-
-# ---------- ENCODE CATEGORICALS ----------
-for col in CAT_COLS:
-    df[col] = df[col].astype("category").cat.codes.astype(int)
-
-# ---------- FILL LAGS ----------
-df.sort_values(["product_id", "date"], inplace=True)
-for prod_id in df["product_id"].unique():
-    prod_df = df[df["product_id"] == prod_id].copy()
-    for lag in [1, 7]:
-        prod_df[f"price_lag{lag}"] = prod_df["revenue"].shift(lag).fillna(0)
-        for comp in ["flipkart_price", "amazon_price", "myntra_price"]:
-            prod_df[f"{comp}_lag{lag}"] = prod_df[comp].shift(lag).fillna(0)
-    df.update(prod_df)
-
-# ---------- PREDICT ----------
-X = df[trained_features]
-dX = xgb.DMatrix(X)
-df["predicted_price"] = model.predict(dX)
-
-# ---------- UPSERT DAILY FEATURES & PREDICTIONS ----------
-FEATURE_ORDER = [
-    "date", "product_id", "brand", "storage_variant", "category",
-    "units_sold", "revenue", "stock", "discount", "is_festival",
-    "views", "clicks", "add_to_cart", "purchases", "bounce_rate",
-    "flipkart_price", "amazon_price", "myntra_price",
-    "day_of_week", "month", "is_weekend"
-] + LAG_COLS
-
-# Use a single bulk insert for all rows
-args_str = ",".join(cursor.mogrify(
-    "(" + ",".join(["%s"] * len(FEATURE_ORDER)) + ")", tuple(row[col] for col in FEATURE_ORDER)
-).decode() for _, row in df.iterrows())
-update_cols = ", ".join([f"{col}=EXCLUDED.{col}" for col in FEATURE_ORDER[2:]])
-
-cursor.execute(f"""
-    INSERT INTO daily_features ({','.join(FEATURE_ORDER)})
-    VALUES {args_str}
-    ON CONFLICT (date, product_id) DO UPDATE SET
-        {update_cols}
-""")
-
-# Predicted prices
-pred_args = ",".join(cursor.mogrify(
-    "(%s,%s,%s)", (row["date"], row["product_id"], float(row["predicted_price"]))
-).decode() for _, row in df.iterrows())
-cursor.execute(f"""
-    INSERT INTO predicted_prices (date, product_id, predicted_price)
-    VALUES {pred_args}
-    ON CONFLICT (date, product_id) DO UPDATE SET
-        predicted_price = EXCLUDED.predicted_price
-""")
-
-conn.commit()
-cursor.close()
-conn.close()
-
-print(f"✅ Daily features + predicted prices upserted from {start_date} to {end_date} for {len(products)} products/day.")
+# ---------- WINDOW PIPELINE ----------
+# Everything one window of dates goes through, from data build to the load marker. The
+# daily run is one window; a backfill runs one per month. The caller commits.
+def process_window(conn, bundle, dates, store, seed, recorder, lookup=False):
+    first, last = dates[0], dates[-1]
+    cursor = conn.cursor()
+
+    # Synthetic sales, behavior and competitor rows for every (date, product), drawn as whole
+    # arrays and joined into one frame; seed=None gives fresh data on every run.
+    with recorder.stage("data_build", rows=len(dates) * len(products)):
+        tables = next(generate(pd.DataFrame(products), first, last, seed=seed, chunk_days=len(dates)))
+        df = daily_rows(tables)
+
+    # One vectorized step per new date against the persisted per-product window.
+    with recorder.stage("lag_fill", rows=len(df)):
+        lag_frames = [store.advance(day_df) for _, day_df in df.groupby("date", sort=True)]
+        df = df.join(pd.concat(lag_frames))
+
+    with recorder.stage("partitions"):
+        ensure_partitions(cursor, first, last)
+
+    # Stream both tables through COPY into staging tables, then merge with ON CONFLICT
+    with recorder.stage("upsert_daily_features", rows=len(df)):
+        feature_stats = copy_upsert(conn, "daily_features", df, FEATURE_COLUMNS)
+
+    # Categoricals are mapped to the bundle's frozen training codes while filling the model
+    # matrix, so df keeps the raw product_id/brand values that are written to the database.
+    # Only seeded (reproducible) data is hashed for the prediction cache, and only a restarted
+    # backfill (lookup=True) can find its rows already stored; those hits reuse the stored
+    # prediction (pricing/prediction_cache.py) and only the misses are scored and written.
+    # With several scoring workers, missed shards are scored in parallel and streamed into
+    # COPY as each one finishes, so scoring and the insert are timed as one stage.
+    shard_timings = []
+    hashed = seed is not None
+    with recorder.stage("encode", rows=len(df)):
+        matrix = bundle.matrix(df)
+    if SCORING_WORKERS > 1:
+        with recorder.stage("cache_lookup", rows=len(df)) as lookup_stage:
+            cached, hashes = lookup_cached(conn, bundle, df, matrix, hashed, lookup)
+            missed = np.isnan(cached)
+        hash_by_row = None if hashes is None else pd.Series(hashes, index=df.index)
+
+        def with_cache_keys(frames):
+            for frame in frames:
+                frame["model_version"] = bundle.version
+                frame["feature_hash"] = None if hashes is None else hash_by_row.loc[frame.index]
+                yield frame
+
+        with recorder.stage("predict_upsert_predicted_prices", rows=int(missed.sum())) as stage:
+            predictions = score_sharded(df[missed], SCORING_WORKERS, bundle.path, timings=shard_timings) if missed.any() else []
+            pred_stats = copy_upsert(conn, "predicted_prices", with_cache_keys(predictions), CACHE_COLUMNS)
+        pred_cache = cache_stats(len(df), int(missed.sum()), lookup_stage.seconds, stage.seconds)
+    else:
+        with recorder.stage("predict", rows=len(df)) as stage:
+            predictions, hashes, missed, pred_cache = predict_cached(conn, bundle, df, matrix, hashed, lookup)
+            df["predicted_price"] = predictions
+            stage.rows = pred_cache["scored"]
+        with recorder.stage("upsert_predicted_prices", rows=int(missed.sum())):
+            pred_stats = copy_upsert(conn, "predicted_prices", cache_frame(df, predictions, hashes, bundle.version, missed),
+                                     CACHE_COLUMNS)
+
+    # Day/week/month rollups (and the totals row) for just the buckets these dates fall in.
+    with recorder.stage("rollups") as stage:
+        rollup_stats = refresh_rollups(conn, first, last)
+        stage.rows = rollup_stats["rows"]
+
+    load_id = record_load(cursor, first, last, len(df))
+    cursor.close()
+    return {"rows": len(df), "load_id": load_id, "feature_stats": feature_stats, "pred_cache": pred_cache,
+            "pred_stats": pred_stats, "rollup_stats": rollup_stats, "shard_timings": shard_timings}
+
+
+# ---------- BACKFILL ----------
+# One calendar month per chunk, each committed with its checkpoint (last date done and lag
+# state), so memory is bounded by a month of rows and a crashed run resumes where it stopped.
+def run_backfill(args, end, conn, cursor, bundle, recorder):
+    job_id = backfill_id(args.start, end, args.seed)
+    checkpoint = None if args.restart else load_checkpoint(cursor, job_id)
+    if checkpoint is None:
+        # Lags start empty at the first date, as on the daily job's first run.
+        start_checkpoint(cursor, job_id, args.start, end, args.seed)
+        conn.commit()
+        last_done, chunks_done, rows_done, store, completed = None, 0, 0, FeatureStore(), False
+    else:
+        last_done, chunks_done, rows_done, store, completed = checkpoint
+    if completed:
+        print(f"✅ Backfill {job_id} already completed ({rows_done:,} rows); use --restart to run it again.")
+        recorder.finish(status="noop", backfill=job_id)
+        return
+    if last_done is not None:
+        print(f"Resuming backfill {job_id} after {last_done} ({chunks_done} chunks, {rows_done:,} rows done)")
+
+    chunks = [(first, last) for first, last in month_chunks(args.start, end) if last_done is None or first > last_done]
+    rec_stats = None
+    for first, last in chunks[:args.max_chunks]:
+        chunk_recorder = StageRecorder("backfill", METRICS_FILE, PROFILE, PROFILE_DIR)
+        dates = [first + timedelta(days=d) for d in range((last - first).days + 1)]
+        result = process_window(conn, bundle, dates, store, chunk_seed(args.seed, first), chunk_recorder,
+                                lookup=args.restart)
+        done = last == end
+        with chunk_recorder.stage("checkpoint_commit"):
+            if done:
+                rec_stats = refresh_recommendations(conn, result["load_id"])
+            save_checkpoint(cursor, job_id, last, result["rows"], store, completed=done)
+            conn.commit()
+        rows_done += result["rows"]
+        chunk_recorder.finish(backfill=job_id, chunk=f"{first}..{last}", rows_done=rows_done,
+                              cache_hit_rate=round(result["pred_cache"]["hit_rate"], 4))
+
+    # Hand the lag state over to the daily run if the backfill reached past it.
+    daily_store = FeatureStore.load()
+    if store.last_date is not None and (daily_store.last_date is None or store.last_date > daily_store.last_date):
+        store.save()
+    cursor.close()
+    conn.close()
+    remaining = len(chunks) - len(chunks[:args.max_chunks])
+    if remaining:
+        print(f"⏸ Backfill {job_id} stopped after {store.last_date}; {remaining} chunks left, re-run to resume.")
+    else:
+        print(f"✅ Backfill {job_id} complete: {rows_done:,} rows for {len(products)} products/day "
+              f"(model v{bundle.version}, {bundle.sha256[:12]}).")
+    if rec_stats is not None:
+        print(format_stats(rec_stats))
+    recorder.finish(status="partial" if remaining else "ok", backfill=job_id,
+                    chunks=len(chunks[:args.max_chunks]), rows_done=rows_done)
+
+
+# ---------- DAILY RUN ----------
+# The last 30 days, minus those the feature store already holds.
+def run_daily(conn, cursor, bundle, recorder):
+    # ---------- DATE RANGE ----------
+    end_date = date.today() - timedelta(days=1)
+    start_date = end_date - timedelta(days=30)  # Last 30 days
+    date_list = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+    # ---------- LOAD FEATURE STORE ----------
+    # Only dates after the last one folded into the store need to be generated and scored.
+    with recorder.stage("feature_store_load"):
+        store = FeatureStore.load()
+    if store.last_date is not None:
+        date_list = [d for d in date_list if d > store.last_date]
+    if not date_list:
+        cursor.close()
+        conn.close()
+        print(f"✅ Feature store already up to date ({store.last_date}); nothing to upsert.")
+        recorder.finish(status="noop")
+        return
+    start_date = date_list[0]
+
+    # ---------- UPSERT DAILY FEATURES & PREDICTIONS ----------
+    result = process_window(conn, bundle, date_list, store, None, recorder)
+    with recorder.stage("recommendations", rows=len(products)):
+        rec_stats = refresh_recommendations(conn, result["load_id"])
+
+    with recorder.stage("commit"):
+        conn.commit()
+    cursor.close()
+    conn.close()
+
+    # Persist lag state only once the rows it describes are committed.
+    store.save()
+
+    print(f"✅ Daily features + predicted prices upserted from {start_date} to {end_date} for {len(products)} products/day "
+          f"(model v{bundle.version}, {bundle.sha256[:12]}).")
+    print(format_stats(result["feature_stats"]))
+    print(format_stats(result["pred_stats"]))
+    if result["shard_timings"]:
+        print(format_timings(result["shard_timings"]))
+    print(format_stats(result["rollup_stats"]))
+    print(format_stats(rec_stats))
+    recorder.finish()
+
+
+def main():
+    args = parser.parse_args()
+    backfill = args.start is not None
+    end = None
+    if backfill:
+        end = args.end or date.today() - timedelta(days=1)
+        if args.start > end:
+            parser.error(f"--start {args.start} is after --end {end}")
+
+    # ---------- INSTRUMENTATION ----------
+    # Wall time, rows, rows/sec and peak RSS of every stage; printed as one JSON line and
+    # written as a Prometheus textfile when the job (or each backfill chunk) ends. In a backfill
+    # each chunk's recorder runs the profiler, so one profile is dumped per chunk.
+    recorder = StageRecorder("backfill" if backfill else "daily_prediction", METRICS_FILE,
+                             None if backfill else PROFILE, PROFILE_DIR)
+
+    # ---------- LOAD MODEL BUNDLE ----------
+    # Current registered version (or PRICING_MODEL_VERSION): booster + feature order + the
+    # categorical codes it was trained with, hash-checked against model/registry.json.
+    with recorder.stage("model_load"):
+        bundle = get_model()
+
+    # ---------- CONNECT ----------
+    with recorder.stage("connect"):
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor()
+
+    # ---------- CREATE TABLES IF NOT EXISTS ----------
+    # History is kept across runs: the feature store only produces rows for new dates.
+    with recorder.stage("ddl"):
+        ensure_tables(cursor, mode=SCHEMA_MODE)
+        ensure_rollups(conn)
+        conn.commit()
+
+    if backfill:
+        run_backfill(args, end, conn, cursor, bundle, recorder)
+    else:
+        run_daily(conn, cursor, bundle, recorder)
+
+
+# Scoring workers (PRICING_SCORING_WORKERS > 1) and spawned processes re-import this file;
+# only the entry point runs the job.
+if __name__ == "__main__":
+    main()
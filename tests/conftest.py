@@ -0,0 +1,50 @@
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def pg_schemas():
+    """Factory of scratch schemas in the configured PostgreSQL (``pricing.config.DB_CONFIG``).
+
+    Tests using it are skipped when no database is reachable; the schemas
+    are dropped afterwards. Yields ``(conn, new_schema)``.
+    """
+    psycopg2 = pytest.importorskip("psycopg2")
+    from pricing.config import DB_CONFIG
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, connect_timeout=5)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+    names = []
+
+    def new_schema():
+        name = f"pricing_test_{uuid.uuid4().hex[:12]}"
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {name}")
+        conn.commit()
+        names.append(name)
+        return name
+
+    yield conn, new_schema
+    conn.rollback()
+    with conn.cursor() as cursor:
+        for name in names:
+            cursor.execute(f"DROP SCHEMA {name} CASCADE")
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def db(pg_schemas):
+    """Connection whose ``search_path`` is a fresh scratch schema."""
+    conn, new_schema = pg_schemas
+    with conn.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {new_schema()}")
+    return conn
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from conftest import ROOT
+from pricing.backfill import backfill_id
+from pricing.feature_store import FeatureStore
+
+START, END, SEED = "2024-01-20", "2024-03-10", 7
+TABLES = ["daily_features", "predicted_prices", "product_rollups", "rollup_totals", "price_recommendations"]
+
+
+def run_backfill(schema, store_path, *args):
+    env = {
+        **os.environ,
+        "PGOPTIONS": f"-c search_path={schema}",
+        "PRICING_FEATURE_STORE": str(store_path),
+        "PRICING_METRICS_FILE": str(store_path.with_suffix(".prom")),
+        "PRICING_PROFILE": "",
+    }
+    run = subprocess.run(
+        [sys.executable, "run_daily_prediction.py", "--start", START, "--end", END, "--seed", str(SEED), *args],
+        cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    )
+    # One JSON line per chunk, then one for the whole backfill.
+    lines = [json.loads(line) for line in run.stdout.splitlines() if line.startswith("{")]
+    return [line for line in lines if "chunk" in line]
+
+
+def snapshot(conn, schema):
+    with conn.cursor() as cursor:
+        cursor.execute(f"SET search_path TO {schema}")
+        tables = {}
+        for table in TABLES:
+            cursor.execute(f"SELECT * FROM {table} ORDER BY 1, 2, 3")
+            # load_id is a serial: a restarted run writes the same rows under new loads.
+            keep = [i for i, column in enumerate(cursor.description) if column.name != "load_id"]
+            tables[table] = [tuple(row[i] for i in keep) for row in cursor.fetchall()]
+        cursor.execute("SELECT last_done, chunks_done, rows, completed, lag_state FROM backfill_checkpoints "
+                       "WHERE backfill_id = %s", (backfill_id(START, END, SEED),))
+        *checkpoint, lag_state = cursor.fetchone()
+    conn.rollback()
+    return tables, checkpoint, FeatureStore.from_bytes(bytes(lag_state))
+
+
+def test_resumed_backfill_equals_one_run(pg_schemas, tmp_path):
+    conn, new_schema = pg_schemas
+    resumed, single = new_schema(), new_schema()
+
+    # Three month chunks: stop after the first, resume for one more, then finish.
+    run_backfill(resumed, tmp_path / "resumed.npz", "--max-chunks", "1")
+    run_backfill(resumed, tmp_path / "resumed.npz", "--max-chunks", "1")
+    run_backfill(resumed, tmp_path / "resumed.npz")
+    run_backfill(single, tmp_path / "single.npz")
+
+    resumed_tables, resumed_checkpoint, resumed_store = snapshot(conn, resumed)
+    single_tables, single_checkpoint, single_store = snapshot(conn, single)
+    assert len(single_tables["daily_features"]) == 51 * 10
+    for table in TABLES:
+        assert resumed_tables[table] == single_tables[table], table
+    assert resumed_checkpoint == single_checkpoint
+    assert resumed_store.last_date == single_store.last_date
+    np.testing.assert_array_equal(resumed_store.history, single_store.history)
+    saved = [FeatureStore.load(str(tmp_path / name)) for name in ("resumed.npz", "single.npz")]
+    np.testing.assert_array_equal(saved[0].history, saved[1].history)
+
+
+def test_restart_reproduces_the_backfill(pg_schemas, tmp_path):
+    conn, new_schema = pg_schemas
+    schema = new_schema()
+    assert [chunk["cache_hit_rate"] for chunk in run_backfill(schema, tmp_path / "store.npz")] == [0.0] * 3
+    first = snapshot(conn, schema)
+    # The same seeded rows again: every prediction comes from the cache.
+    assert [chunk["cache_hit_rate"] for chunk in run_backfill(schema, tmp_path / "store.npz", "--restart")] == [1.0] * 3
+    second = snapshot(conn, schema)
+    assert first[0] == second[0]
+    assert first[1] == second[1]
+    np.testing.assert_array_equal(first[2].history, second[2].history)
@@ -0,0 +1,70 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+
+sys.path.insert(0, str(ROOT / "app"))
+from charts import MIN_SERIES_POINTS, downsample, lttb, pick_resolution  # noqa: E402
+
+
+def bucket_edges(n, n_out):
+    return np.linspace(1, n - 1, n_out - 1).astype(int)
+
+
+@pytest.mark.parametrize("n_out", [100, 101, 500])
+def test_short_series_are_kept_whole(n_out):
+    np.testing.assert_array_equal(lttb(np.arange(100), np.arange(100.0), n_out), np.arange(100))
+
+
+@pytest.mark.parametrize("n_out", [0, 1, MIN_SERIES_POINTS - 1])
+def test_budgets_below_three_points_keep_everything(n_out):
+    np.testing.assert_array_equal(lttb(np.arange(10), np.arange(10.0), n_out), np.arange(10))
+
+
+@pytest.mark.parametrize("n", [5, 17, 100])
+def test_one_point_per_bucket_and_both_endpoints(n):
+    y = np.random.default_rng(n).normal(size=n)
+    for n_out in range(MIN_SERIES_POINTS, n):
+        keep = lttb(np.arange(n), y, n_out)
+        assert len(keep) == n_out
+        assert keep[0] == 0 and keep[-1] == n - 1
+        edges = bucket_edges(n, n_out)
+        for i, index in enumerate(keep[1:-1]):
+            assert edges[i] <= index < edges[i + 1]
+
+
+def test_the_spike_of_each_bucket_is_kept():
+    n, n_out = 1_000, 12
+    edges = bucket_edges(n, n_out)
+    y = np.zeros(n)
+    spikes = (edges[:-1] + edges[1:]) // 2
+    y[spikes] = np.arange(1, len(spikes) + 1) * np.where(np.arange(len(spikes)) % 2, 1, -1)
+    np.testing.assert_array_equal(lttb(np.arange(n), y, n_out)[1:-1], spikes)
+
+
+def test_downsample_datetime_rows():
+    df = pd.DataFrame({"date": pd.date_range("2024-01-01", periods=365), "units": np.sin(np.arange(365) / 9)})
+    out = downsample(df, "date", "units", 50)
+    assert len(out) == 50
+    assert out["date"].iloc[0] == df["date"].iloc[0] and out["date"].iloc[-1] == df["date"].iloc[-1]
+    assert out["date"].is_monotonic_increasing
+    assert downsample(df, "date", "units", 365) is df
+
+
+@pytest.mark.parametrize("days, n_series, expected", [
+    (30, 1, "day"),
+    (5_000, 1, "day"),             # exactly on the budget
+    (5_001, 1, "week"),
+    (366, 13, "day"),              # 4,758 points
+    (366, 14, "week"),             # 5,124 daily points, 742 weekly
+    (366, 100, "month"),           # 5,300 weekly points, 1,300 monthly
+    (3_650, 1_000, "month"),       # over budget at every resolution: coarsest
+    (30, 0, "day"),                # no series counts as one
+])
+def test_pick_resolution(days, n_series, expected):
+    start = pd.Timestamp("2024-01-01")
+    end = start + pd.Timedelta(days=days - 1)
+    assert pick_resolution(start, end, n_series) == expected
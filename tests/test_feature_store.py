@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from pricing.feature_store import FeatureStore
+from pricing.features import LAG_COLS, add_lag_features
+from pricing.synthetic import catalog, daily_rows, generate
+
+
+def synthetic_days(n_products=6, start="2024-01-01", end="2024-01-25"):
+    return pd.concat([daily_rows(tables) for tables in generate(catalog(n_products), start, end, seed=3)],
+                     ignore_index=True)
+
+
+def store_lags(store, df):
+    parts = []
+    for _, day_df in df.groupby("date", sort=True):
+        parts.append(pd.concat([day_df[["date", "product_id"]], store.advance(day_df)], axis=1))
+    return pd.concat(parts).sort_values(["product_id", "date"]).reset_index(drop=True)
+
+
+def test_store_matches_add_lag_features():
+    df = synthetic_days()
+    expected = add_lag_features(df, fill_value=0)
+    got = store_lags(FeatureStore(), df)
+    pd.testing.assert_frame_equal(got[["date", "product_id"]], expected[["date", "product_id"]])
+    np.testing.assert_array_equal(got[LAG_COLS].to_numpy(), expected[LAG_COLS].to_numpy(dtype=float))
+
+
+def test_store_round_trip_continues_the_same_lags():
+    df = synthetic_days()
+    cut = pd.Timestamp("2024-01-10")
+    store = FeatureStore()
+    first = store_lags(store, df[df["date"] < cut])
+    second = store_lags(FeatureStore.from_bytes(store.to_bytes()), df[df["date"] >= cut])
+    got = pd.concat([first, second]).sort_values(["product_id", "date"]).reset_index(drop=True)
+    expected = add_lag_features(df, fill_value=0)
+    np.testing.assert_array_equal(got[LAG_COLS].to_numpy(), expected[LAG_COLS].to_numpy(dtype=float))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pricing.features import COMPETITOR_COLS, LAG_COLS, LAGS, add_lag_features, group_positions, grouped_rolling_mean, \
+    grouped_shift
+
+
+def unsorted_groups(seed=5):
+    """Shuffled rows of products with 1 to 20 days each, so some groups are shorter than a lag."""
+    rng = np.random.default_rng(seed)
+    lengths = [1, 3, 7, 8, 20, 12]
+    df = pd.DataFrame({
+        "product_id": np.repeat([f"M{100 + i}" for i in range(len(lengths))], lengths),
+        "date": np.concatenate([pd.date_range("2024-01-01", periods=n) for n in lengths]),
+    })
+    df["price"] = rng.integers(10_000, 90_000, len(df)).astype(float)
+    for col in COMPETITOR_COLS:
+        df[col] = np.where(rng.random(len(df)) < 0.1, np.nan, rng.integers(10_000, 90_000, len(df)))
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def test_group_positions():
+    keys = np.array(["a", "a", "b", "c", "c", "c"])
+    np.testing.assert_array_equal(group_positions(keys), [0, 1, 0, 0, 1, 2])
+    assert len(group_positions(keys[:0])) == 0
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 7, 8, 9])
+def test_grouped_primitives_match_pandas(n):
+    # The reference runs on date order with products interleaved, as the notebook's frame is.
+    df = unsorted_groups().sort_values("date", kind="stable")
+    grouped = df.groupby("product_id")
+    df["shift"] = grouped["amazon_price"].shift(n)
+    df["rolling"] = grouped["price"].transform(lambda s: s.shift(1).rolling(n).mean())
+
+    df = df.sort_values(["product_id", "date"]).reset_index(drop=True)
+    positions = group_positions(df["product_id"].to_numpy())
+    np.testing.assert_array_equal(grouped_shift(df["amazon_price"].to_numpy(dtype=float), positions, n), df["shift"])
+    np.testing.assert_allclose(grouped_rolling_mean(df["price"].to_numpy(dtype=float), positions, n), df["rolling"],
+                               rtol=1e-12)
+
+
+def test_add_lag_features_matches_groupby():
+    df = unsorted_groups()
+    expected = df.sort_values("date", kind="stable")
+    grouped = expected.groupby("product_id")
+    for lag in LAGS:
+        expected[f"price_lag{lag}"] = grouped["price"].shift(lag)
+        expected[f"price_rolling{lag}"] = grouped["price"].transform(lambda s: s.shift(1).rolling(lag).mean())
+        for col in COMPETITOR_COLS:
+            expected[f"{col}_lag{lag}"] = grouped[col].shift(lag)
+    expected = expected.dropna(subset=[f"price_lag{max(LAGS)}"]).sort_values(["product_id", "date"])
+    expected = expected.reset_index(drop=True)
+
+    got = add_lag_features(df)
+    pd.testing.assert_frame_equal(got[["product_id", "date"]], expected[["product_id", "date"]])
+    np.testing.assert_allclose(got[LAG_COLS].to_numpy(), expected[LAG_COLS].to_numpy(dtype=float), rtol=1e-12)
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from pricing.loader import copy_upsert
+
+COLUMNS = ["date", "product_id", "predicted_price"]
+
+
+@pytest.fixture
+def table(db):
+    with db.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE loader_test (
+                date DATE,
+                product_id VARCHAR(10),
+                predicted_price FLOAT,
+                PRIMARY KEY (date, product_id)
+            )
+        """)
+    return "loader_test"
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=COLUMNS).assign(date=lambda df: pd.to_datetime(df["date"]))
+
+
+def fetch(db, table):
+    with db.cursor() as cursor:
+        cursor.execute(f"SELECT date::text, product_id, predicted_price FROM {table} ORDER BY 1, 2")
+        return cursor.fetchall()
+
+
+def test_last_staged_row_wins_for_duplicate_keys(db, table):
+    # chunk_rows=2 puts the duplicates of M1 in different COPY chunks, those of M2 in one.
+    df = frame([
+        ("2024-01-01", "M1", 1.0),
+        ("2024-01-01", "M2", 2.0),
+        ("2024-01-01", "M2", 3.0),
+        ("2024-01-01", "M1", 4.0),
+    ])
+    stats = copy_upsert(db, table, df, COLUMNS, chunk_rows=2)
+    assert stats["rows"] == 4
+    assert stats["written"] == 2
+    assert fetch(db, table) == [("2024-01-01", "M1", 4.0), ("2024-01-01", "M2", 3.0)]
+
+
+def test_unchanged_rows_are_not_rewritten(db, table):
+    df = frame([("2024-01-01", "M1", 1.0), ("2024-01-02", "M1", 2.0), ("2024-01-03", "M1", 3.0)])
+    assert copy_upsert(db, table, df, COLUMNS)["written"] == 3
+    assert copy_upsert(db, table, df, COLUMNS)["written"] == 0
+
+    df.loc[1, "predicted_price"] = 20.0
+    assert copy_upsert(db, table, df, COLUMNS)["written"] == 1
+    assert [row[2] for row in fetch(db, table)] == [1.0, 20.0, 3.0]
+
+
+def test_frames_are_copied_in_chunks(db, table):
+    dates = pd.date_range("2024-01-01", periods=10).strftime("%Y-%m-%d")
+    df = frame([(day, f"M{i % 3}", float(i)) for i, day in enumerate(dates)])
+    stats = copy_upsert(db, table, iter([df.iloc[:7], df.iloc[7:]]), COLUMNS, chunk_rows=3)
+    assert stats["chunks"] == 4  # 3 + 3 + 1 rows, then 3
+    assert stats["rows"] == stats["written"] == 10
+    assert fetch(db, table) == [(day, f"M{i % 3}", float(i)) for i, day in enumerate(dates)]
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pricing.model_bundle import ModelBundle
+
+VOCAB = {"product_id": ["M100", "M101", "M102", "M103"], "brand": ["Apple", "Samsung"]}
+
+
+@pytest.fixture
+def bundle():
+    return ModelBundle(None, ["product_id", "units_sold", "brand"], VOCAB)
+
+
+def test_codes_come_from_the_bundle_vocabulary(bundle):
+    values = ["M103", "M101", "M999", "M100", "M103"]
+    expected = np.array([3, 1, np.nan, 0, 3], dtype=np.float32)
+    np.testing.assert_array_equal(bundle.codes("product_id", pd.Series(values)), expected)
+    # Another run's categories (an unseen product, a different order) give other cat.codes;
+    # the bundle codes must not move.
+    categorical = pd.Series(pd.Categorical(values, categories=["M999", "M103", "M101", "M100"]))
+    assert categorical.cat.codes.tolist() == [1, 2, 0, 3, 1]
+    np.testing.assert_array_equal(bundle.codes("product_id", categorical), expected)
+
+
+def test_missing_and_unused_categories(bundle):
+    values = pd.Series(pd.Categorical(["Samsung", None, "Nokia"], categories=["Samsung", "Nokia", "Apple"]))
+    np.testing.assert_array_equal(bundle.codes("brand", values), np.array([1, np.nan, np.nan], dtype=np.float32))
+
+
+def test_matrix_is_in_model_column_order(bundle):
+    df = pd.DataFrame({
+        "brand": pd.Categorical(["Samsung", "Apple", "Oppo"]),
+        "units_sold": [3, np.nan, 5],
+        "product_id": ["M102", "M102", "M100"],
+    })
+    out = bundle.matrix(df)
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out, np.array([[2, 3, 1], [2, np.nan, 0], [0, 5, np.nan]], dtype=np.float32))
+    rows = [bundle.row_vector(row) for row in df.astype({"brand": str}).to_dict("records")]
+    np.testing.assert_array_equal(np.vstack(rows), out)
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from pricing.feature_store import FeatureStore
+from pricing.parallel_scoring import predict_sharded, score_sharded
+from pricing.registry import get_model
+from pricing.synthetic import catalog, daily_rows, generate
+
+
+def scoring_frame(n_products=40, start="2024-01-01", end="2024-01-20"):
+    df = pd.concat([daily_rows(tables) for tables in generate(catalog(n_products), start, end, seed=5)],
+                   ignore_index=True)
+    store = FeatureStore()
+    return df.join(pd.concat([store.advance(day_df) for _, day_df in df.groupby("date", sort=True)]))
+
+
+def test_sharded_scoring_matches_single_process():
+    bundle = get_model()
+    df = scoring_frame().sample(frac=1, random_state=0)  # shards must not depend on row order
+    expected = bundle.predict(df)
+
+    frames = list(score_sharded(df, workers=2, bundle_path=bundle.path, n_shards=5))
+    got = pd.concat(frames)
+    assert len(frames) == 5
+    assert sorted(got.index) == sorted(df.index)
+    assert got["predicted_price"].dtype == np.float64
+    np.testing.assert_array_equal(got["predicted_price"].reindex(df.index).to_numpy(), expected)
+    np.testing.assert_array_equal(predict_sharded(df, 2, bundle.path), expected)
+
+
+def test_a_product_stays_in_one_shard():
+    df = scoring_frame(n_products=12)
+    timings = []
+    frames = list(score_sharded(df, workers=2, bundle_path=get_model().path, timings=timings))
+    owners = pd.concat([frame.assign(shard=i) for i, frame in enumerate(frames)]).groupby("product_id")["shard"]
+    assert (owners.nunique() == 1).all()
+    assert sum(t["rows"] for t in timings) == len(df)
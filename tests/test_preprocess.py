@@ -0,0 +1,26 @@
+import pytest
+
+from pricing.datasets import source_path
+from pricing.preprocess import CHUNK_ROWS, SOURCES, preprocess
+
+
+@pytest.mark.parametrize("chunk_rows", [CHUNK_ROWS, 997])
+def test_preprocess_matches_the_notebook(tmp_path, chunk_rows):
+    out = tmp_path / "preprocessed.csv"
+    stats = preprocess({name: source_path(name) for name in SOURCES}, str(out), chunk_rows)
+    if chunk_rows < CHUNK_ROWS:
+        assert stats["blocks"] > 1
+    with open(source_path("preprocessed"), "rb") as f:
+        assert out.read_bytes() == f.read()
+    assert not (tmp_path / "preprocessed.csv.tmp").exists()
+
+
+def test_unsorted_source_is_rejected(tmp_path):
+    sales = tmp_path / "sales.csv"
+    with open(source_path("sales")) as f:
+        header, *rows = f.read().splitlines()
+    sales.write_text("\n".join([header] + rows[::-1]) + "\n")
+    paths = {name: source_path(name) for name in SOURCES} | {"sales": str(sales)}
+    with pytest.raises(ValueError, match="not sorted by date"):
+        preprocess(paths, str(tmp_path / "out.csv"), chunk_rows=500)
+    assert not (tmp_path / "out.csv.tmp").exists()
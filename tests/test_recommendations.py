@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pricing.recommendations import HIGH_STOCK, INCREASE_MIN_UNITS, LOW_SALES, classify
+
+
+def recommend(predicted, competitors=(90.0, 100.0, 110.0), units=50.0, stock=50.0):
+    flipkart, amazon, myntra = competitors
+    rec_df = pd.DataFrame({"product_id": ["M100"], "predicted_price": [predicted], "flipkart_price": [flipkart],
+                           "amazon_price": [amazon], "myntra_price": [myntra], "units_sold": [units],
+                           "stock": [stock]})
+    return classify(rec_df).iloc[0]
+
+
+@pytest.mark.parametrize("predicted, units, expected", [
+    (105.01, 50.0, "Increase Price"),
+    (105.0, 50.0, "Maintain Price"),                          # 5% above is still in line
+    (150.0, INCREASE_MIN_UNITS, "Maintain Price"),            # too high, but not selling enough
+    (150.0, INCREASE_MIN_UNITS + 0.01, "Increase Price"),
+    (100.0, 0.0, "Maintain Price"),
+    (95.0, 50.0, "Maintain Price"),                           # 5% below is still in line
+    (94.99, 50.0, "Decrease Price"),
+    (50.0, 0.0, "Decrease Price"),                            # too low does not depend on sales
+    (np.nan, 50.0, "Maintain Price"),                         # no predictions yet
+])
+def test_thresholds_around_the_competitor_average(predicted, units, expected):
+    assert recommend(predicted, units=units)["recommendation"] == expected
+
+
+def test_average_skips_missing_competitors():
+    row = recommend(94.0, competitors=(np.nan, 100.0, np.nan))
+    assert row["avg_competitor_price"] == 100.0
+    assert row["recommendation"] == "Decrease Price"
+
+
+@pytest.mark.parametrize("units, stock, high_stock, low_sales", [
+    (LOW_SALES, HIGH_STOCK, False, False),
+    (LOW_SALES - 0.5, HIGH_STOCK + 0.5, True, True),
+])
+def test_alert_flags(units, stock, high_stock, low_sales):
+    row = recommend(100.0, units=units, stock=stock)
+    assert (row["high_stock"], row["low_sales"]) == (high_stock, low_sales)
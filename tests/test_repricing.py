@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from pricing.feature_store import WINDOW, FeatureStore
+from pricing.features import add_lag_features
+from pricing.repricing import KEY_COLS, PRICE_COLUMNS, apply_changes, parse_events, patch_store, price_changes
+from pricing.synthetic import catalog, daily_rows, generate
+
+
+def synthetic_days(start="2024-01-01", end="2024-01-24"):
+    return pd.concat([daily_rows(tables) for tables in generate(catalog(4), start, end, seed=11)],
+                     ignore_index=True)
+
+
+def with_lags(df):
+    return add_lag_features(df, fill_value=0).set_index(KEY_COLS)
+
+
+def test_parse_events_keeps_valid_updates():
+    events, rejected = parse_events([
+        {"date": "2024-01-05T13:45:00", "product_id": "M100", "amazon_price": 19999.6},
+        {"date": "2024-01-05", "product_id": "M101", "flipkart_price": "20500", "myntra_price": -3},
+        {"date": "not a date", "product_id": "M100", "amazon_price": 1},
+        {"date": "2024-01-05", "product_id": 101, "amazon_price": 1},
+        {"date": "2024-01-05", "product_id": "M100", "amazon_price": 0},
+        {"date": "2024-01-05", "product_id": "M100"},
+    ])
+    assert rejected == 4
+    assert events["date"].tolist() == [pd.Timestamp("2024-01-05")] * 2
+    assert events["product_id"].tolist() == ["M100", "M101"]
+    assert events.loc[0, "amazon_price"] == 20000
+    assert events.loc[1, "flipkart_price"] == 20500
+    assert events.loc[[0, 1], ["flipkart_price", "myntra_price"]].isna().values.tolist() == [[True, True], [False, True]]
+
+
+def test_price_changes_drops_unchanged_and_unknown_rows():
+    stored = with_lags(synthetic_days())
+    key = (pd.Timestamp("2024-01-10"), "M101")
+    latest = pd.DataFrame(
+        {"flipkart_price": [stored.loc[key, "flipkart_price"], 1.0],
+         "amazon_price": [stored.loc[key, "amazon_price"] + 100, 2.0],
+         "myntra_price": [np.nan, 3.0]},
+        index=pd.MultiIndex.from_tuples([key, (pd.Timestamp("2030-01-01"), "M101")], names=KEY_COLS),
+    )
+    changes = price_changes(latest, stored)
+    assert changes.to_dict("records") == [{"date": key[0], "product_id": "M101", "column": "amazon_price",
+                                           "value": stored.loc[key, "amazon_price"] + 100}]
+
+
+def test_mid_window_change_gives_the_lags_of_a_full_rebuild():
+    df = synthetic_days()
+    rows = with_lags(df)
+    changes = pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-12", "2024-01-12", "2024-01-20"]),
+        "product_id": ["M102", "M100", "M102"],
+        "column": ["amazon_price", "myntra_price", "amazon_price"],
+        "value": [15_000.0, 31_000.0, 16_000.0],
+    })
+    patched = apply_changes(rows, changes)
+
+    rebuilt = df.copy()
+    for change in changes.itertuples():
+        row = (rebuilt["date"] == change.date) & (rebuilt["product_id"] == change.product_id)
+        rebuilt.loc[row, change.column] = change.value
+    expected = with_lags(rebuilt)
+    pd.testing.assert_frame_equal(patched[PRICE_COLUMNS], expected[PRICE_COLUMNS], check_dtype=False)
+    touched = (patched[PRICE_COLUMNS] != rows[PRICE_COLUMNS]).any(axis=1)
+    assert touched.sum() == 8  # each change: its row, the next day, a week later (one past the end)
+
+
+def test_patch_store_matches_a_rebuilt_store():
+    df = synthetic_days()
+    last = df["date"].max()
+    changes = pd.DataFrame({
+        "date": [last - pd.Timedelta(days=2), last - pd.Timedelta(days=WINDOW)],  # inside / outside the window
+        "product_id": ["M101", "M101"],
+        "column": ["flipkart_price", "flipkart_price"],
+        "value": [12_345.0, 23_456.0],
+    })
+    store = FeatureStore()
+    for _, day_df in df.groupby("date", sort=True):
+        store.advance(day_df)
+    assert patch_store(store, changes) == 1
+
+    rebuilt = df.copy()
+    for change in changes.itertuples():
+        row = (rebuilt["date"] == change.date) & (rebuilt["product_id"] == change.product_id)
+        rebuilt.loc[row, change.column] = change.value
+    expected = FeatureStore()
+    for _, day_df in rebuilt.groupby("date", sort=True):
+        expected.advance(day_df)
+    np.testing.assert_array_equal(store.history, expected.history)
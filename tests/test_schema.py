@@ -0,0 +1,23 @@
+from datetime import date
+
+from pricing.schema import detach_partitions_before, ensure_partitions, ensure_tables, list_partitions, table_kind
+
+
+def test_a_month_can_be_detached_again(db):
+    cursor = db.cursor()
+    ensure_tables(cursor, "partitioned")
+    ensure_partitions(cursor, date(2024, 1, 1), date(2024, 2, 15), tables=["daily_features"])
+    assert detach_partitions_before(cursor, date(2024, 2, 1), tables=["daily_features"]) == [
+        "daily_features_y2024m01_detached"]
+
+    # Load January again, then detach it a second time: the first copy is kept.
+    ensure_partitions(cursor, date(2024, 1, 1), date(2024, 1, 31), tables=["daily_features"])
+    assert detach_partitions_before(cursor, date(2024, 2, 1), tables=["daily_features"]) == [
+        "daily_features_y2024m01_detached_2"]
+    ensure_partitions(cursor, date(2024, 1, 1), date(2024, 1, 31), tables=["daily_features"])
+    assert detach_partitions_before(cursor, date(2024, 2, 1), tables=["daily_features"]) == [
+        "daily_features_y2024m01_detached_3"]
+
+    assert table_kind(cursor, "daily_features_y2024m01_detached") == "plain"
+    assert [name for name, _ in list_partitions(cursor, "daily_features")] == ["daily_features_y2024m02"]
+    db.rollback()